@@ -0,0 +1,129 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+from analytics.embeddings import DEFAULT_MODEL, STORE_DIR, EmbeddingStore, sbert_encoder, store_path
+from dashboards.dataset import dataset_version, load_text, source_digest
+
+# Liste confrontate con la query per ogni ricerca: più liste, risultati più vicini a quelli esatti
+N_PROBE = 16
+# Vettori per blocco durante la costruzione: limita la memoria delle matrici di similarità
+BLOCK_SIZE = 65536
+
+
+class IVFIndex:
+    # Indice IVF (inverted file) per la similarità coseno su vettori normalizzati. I vettori sono
+    # divisi in liste attorno a centroidi trovati con k-means sferico e salvati ordinati per lista,
+    # quindi ogni lista è una fetta contigua del file. Una ricerca confronta la query con i
+    # centroidi e calcola i prodotti scalari solo nelle n_probe liste più vicine
+
+    def __init__(self, centroids, offsets, ids, vectors, meta=None):
+        self.centroids = centroids
+        self.offsets = offsets
+        self.ids = ids
+        self.vectors = vectors
+        self.meta = meta or {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, vectors, ids=None, n_lists=None, n_iter=10, sample_per_list=64, seed=0):
+        n = len(vectors)
+        ids = np.arange(n) if ids is None else np.asarray(ids)
+        n_lists = n_lists or max(1, int(np.sqrt(n)))
+        rng = np.random.default_rng(seed)
+        # I centroidi si stimano su un campione, poi ogni vettore va nella lista del più vicino
+        sample = np.sort(rng.choice(n, size=min(n, n_lists * sample_per_list), replace=False))
+        centroids = _kmeans(np.asarray(vectors[sample], dtype='float32'), n_lists, n_iter, rng)
+        assignment = np.concatenate([
+            _nearest(np.asarray(vectors[start:start + BLOCK_SIZE], dtype='float32'), centroids)
+            for start in range(0, n, BLOCK_SIZE)
+        ]) if n else np.zeros(0, dtype='int64')
+        order = np.argsort(assignment, kind='stable')
+        offsets = np.searchsorted(assignment[order], np.arange(n_lists + 1))
+        dim = centroids.shape[1]
+        ordered = np.empty((n, dim), dtype='float32')
+        for start in range(0, n, BLOCK_SIZE):
+            ordered[start:start + BLOCK_SIZE] = vectors[order[start:start + BLOCK_SIZE]]
+        return cls(centroids, offsets, ids[order].astype('int64'), ordered)
+
+    def save(self, path, **meta):
+        os.makedirs(path, exist_ok=True)
+        for name in ['centroids', 'offsets', 'ids', 'vectors']:
+            tmp_path = os.path.join(path, f'{name}.{os.getpid()}.tmp.npy')
+            np.save(tmp_path, getattr(self, name))
+            os.replace(tmp_path, os.path.join(path, f'{name}.npy'))
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump(dict(meta, n_lists=len(self.centroids), size=len(self)), f)
+
+    @classmethod
+    def load(cls, path):
+        # I vettori restano su disco in memory-map: in memoria finiscono solo le liste consultate
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r' if name == 'vectors' else None)
+            for name in ['centroids', 'offsets', 'ids', 'vectors']
+        }
+        return cls(meta=meta, **arrays)
+
+    def search(self, query, k=10, n_probe=N_PROBE):
+        # Id e similarità coseno dei k vettori più vicini alla query (normalizzata), in ordine decrescente
+        query = np.asarray(query, dtype='float32').ravel()
+        n_probe = min(n_probe, len(self.centroids))
+        lists = np.argpartition(-(self.centroids @ query), n_probe - 1)[:n_probe]
+        # Prodotti scalari lista per lista, senza copiare i vettori in un'unica matrice
+        scores = [self.vectors[self.offsets[i]:self.offsets[i + 1]] @ query for i in lists]
+        positions = [np.arange(self.offsets[i], self.offsets[i + 1]) for i in lists]
+        scores, positions = np.concatenate(scores), np.concatenate(positions)
+        if len(scores) > k:
+            best = np.argpartition(-scores, k - 1)[:k]
+            scores, positions = scores[best], positions[best]
+        order = np.argsort(-scores, kind='stable')
+        return self.ids[positions[order]], scores[order]
+
+
+def _nearest(vectors, centroids):
+    return np.argmax(vectors @ centroids.T, axis=1)
+
+
+def _kmeans(vectors, n_lists, n_iter, rng):
+    # k-means sferico: i centroidi sono medie normalizzate, la distanza è il coseno
+    centroids = vectors[rng.choice(len(vectors), size=n_lists, replace=False)].copy()
+    for _ in range(n_iter):
+        assignment = _nearest(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        # Le liste rimaste vuote ripartono da un vettore a caso
+        empty = norms[:, 0] == 0
+        sums[empty] = vectors[rng.choice(len(vectors), size=int(empty.sum()))]
+        centroids = sums / np.linalg.norm(sums, axis=1, keepdims=True)
+    return centroids
+
+
+def index_path(model_name=DEFAULT_MODEL, path=STORE_DIR):
+    return os.path.join(store_path(model_name, path), 'ivf')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Costruisce l\'indice degli statement simili dagli embedding salvati')
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    parser.add_argument('--lists', type=int, default=None, help='numero di liste (default: radice del numero di statement)')
+    args = parser.parse_args()
+
+    store = EmbeddingStore(args.model)
+    statements = load_text(['statement'])['statement']
+    # Gli id dell'indice sono le righe del dataset; gli statement mancanti vengono codificati prima
+    vectors = store.embed(statements, sbert_encoder(args.model))
+    index = IVFIndex.build(vectors, n_lists=args.lists)
+    # Versione e contenuto del dataset: la dashboard scarta l'indice se le righe sono cambiate
+    index.save(index_path(args.model), model=args.model, dataset_version=dataset_version(), dataset_digest=source_digest())
+    print(f'Indice di {len(index)} statement in {len(index.centroids)} liste: {index_path(args.model)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+import numpy as np
+
+MODEL_NAME = 'google-bert/bert-base-uncased'
+MAX_LENGTH = 128
+BATCH_SIZE = 32
+
+
+class BertExtractor:
+    # Embedding CLS (pooler_output) di BERT come in embedding_function di classifier.ipynb.
+    # Gli statement si tokenizzano una volta senza padding e si ordinano per lunghezza: ogni batch
+    # contiene testi di lunghezza simile ed è riempito solo fino al più lungo, invece che sempre
+    # fino a max_length. Le righe del risultato sono nell'ordine dei testi in ingresso
+    def __init__(self, model_name=MODEL_NAME, max_length=MAX_LENGTH, batch_size=BATCH_SIZE, threads=None,
+                 device=None, tokenizer=None, model=None):
+        import torch
+        from transformers import AutoTokenizer, BertModel
+
+        if threads:
+            torch.set_num_threads(threads)
+        self.torch = torch
+        self.device = torch.device(device or ('cuda' if torch.cuda.is_available() else 'cpu'))
+        self.tokenizer = tokenizer or AutoTokenizer.from_pretrained(model_name)
+        self.model = (model or BertModel.from_pretrained(model_name)).to(self.device).eval()
+        self.max_length = max_length
+        self.batch_size = batch_size
+
+    def __call__(self, texts):
+        input_ids = self.tokenizer(list(texts), truncation=True, max_length=self.max_length)['input_ids']
+        lengths = np.fromiter(map(len, input_ids), dtype='int64', count=len(input_ids))
+        # Stesso ordine per lunghezze uguali: risultati riproducibili
+        order = np.argsort(lengths, kind='stable')
+        embeddings = np.empty((len(input_ids), self.model.config.hidden_size), dtype='float32')
+        with self.torch.inference_mode():
+            for start in range(0, len(order), self.batch_size):
+                rows = order[start:start + self.batch_size]
+                batch = self.tokenizer.pad({'input_ids': [input_ids[i] for i in rows]}, return_tensors='pt')
+                output = self.model(
+                    input_ids=batch['input_ids'].to(self.device),
+                    attention_mask=batch['attention_mask'].to(self.device),
+                )
+                embeddings[rows] = output.pooler_output.float().cpu().numpy()
+        return embeddings
+
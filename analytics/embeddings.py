@@ -0,0 +1,178 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+
+import numpy as np
+
+from dashboards.dataset import DATA_DIR, load_text
+
+# EMBEDDING_STORE: directory dei vettori già calcolati, condivisa da notebook, classificatore e dashboard
+STORE_DIR = os.environ.get('EMBEDDING_STORE', os.path.join(DATA_DIR, 'embeddings'))
+DEFAULT_MODEL = 'all-mpnet-base-v2'
+# Testi codificati per chiamata all'encoder
+BATCH_SIZE = 256
+# Chiave di un testo: hash esadecimale di (modello, testo)
+KEY_DTYPE = 'S32'
+
+
+def text_keys(texts, model_name):
+    return np.array(
+        [hashlib.blake2b(f'{model_name}\n{text}'.encode(), digest_size=16).hexdigest() for text in texts],
+        dtype=KEY_DTYPE,
+    )
+
+
+def store_path(model_name=DEFAULT_MODEL, path=STORE_DIR):
+    return os.path.join(path, re.sub(r'[^\w.-]+', '_', model_name))
+
+
+def sbert_encoder(model=DEFAULT_MODEL):
+    # Encoder per EmbeddingStore.embed: vettori normalizzati come nei notebook (il coseno è un prodotto scalare).
+    # Con il nome del modello, il modello si carica alla prima chiamata: se lo store ha già tutti i testi non serve
+    loaded = [] if isinstance(model, str) else [model]
+    lock = threading.Lock()
+
+    def encode(texts):
+        if not loaded:
+            # Con più thread (callback concorrenti della dashboard) il modello si carica una volta sola
+            with lock:
+                if not loaded:
+                    from sentence_transformers import SentenceTransformer
+                    loaded.append(SentenceTransformer(model))
+        return loaded[0].encode(texts, normalize_embeddings=True, show_progress_bar=False)
+    return encode
+
+
+class EmbeddingStore:
+    # Vettori di un modello indirizzati per contenuto: la riga di un testo si trova con l'hash di
+    # (modello, testo), quindi righe aggiunte, dropna o un ordine diverso del dataset non invalidano
+    # nulla e si codificano solo i testi mai visti. Su disco: vectors.bin (matrice in memory-map,
+    # solo in append), keys.npy (chiavi nello stesso ordine delle righe) e meta.json
+
+    def __init__(self, model_name=DEFAULT_MODEL, path=STORE_DIR, dtype='float16'):
+        self.model_name = model_name
+        self.path = store_path(model_name, path)
+        self.dtype = np.dtype(dtype)
+        self.dim = None
+        self.reload()
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def reload(self):
+        # Rilegge le righe scritte nel frattempo da un altro processo
+        try:
+            with open(self._file('meta.json')) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            meta = None
+        if meta is None:
+            self.keys = np.zeros(0, dtype=KEY_DTYPE)
+        else:
+            if meta['model'] != self.model_name:
+                raise ValueError(f"Lo store in {self.path} contiene vettori di {meta['model']}")
+            self.dim = meta['dim']
+            self.dtype = np.dtype(meta['dtype'])
+            self.keys = np.load(self._file('keys.npy'))
+        if len(self.keys):
+            self.vectors = np.memmap(self._file('vectors.bin'), dtype=self.dtype, mode='r', shape=(len(self.keys), self.dim))
+        else:
+            self.vectors = np.zeros((0, self.dim or 0), dtype=self.dtype)
+        # Indice delle chiavi: ordinate, con la riga corrispondente
+        self._order = np.argsort(self.keys, kind='stable')
+        self._sorted = self.keys[self._order]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, keys):
+        # Riga di ogni chiave nella matrice, -1 se il testo non è ancora stato codificato
+        keys = np.asarray(keys, dtype=KEY_DTYPE)
+        if len(self._sorted) == 0:
+            return np.full(len(keys), -1, dtype='int64')
+        positions = np.minimum(np.searchsorted(self._sorted, keys), len(self._sorted) - 1)
+        found = self._sorted[positions] == keys
+        return np.where(found, self._order[positions], -1)
+
+    def rows(self, texts):
+        return self.lookup(text_keys(texts, self.model_name))
+
+    def encode(self, texts, encoder, batch_size=BATCH_SIZE):
+        # Codifica a batch i soli testi mancanti (una volta sola anche se ripetuti) e restituisce la riga di ogni testo
+        texts = [str(text) for text in texts]
+        keys = text_keys(texts, self.model_name)
+        missing = np.flatnonzero(self.lookup(keys) < 0)
+        new_keys, first = np.unique(keys[missing], return_index=True)
+        # Nell'ordine in cui compaiono: un dataset codificato da zero occupa righe consecutive
+        order = np.argsort(missing[first])
+        new_keys, first = new_keys[order], missing[first][order]
+
+        written = 0
+        if len(first):
+            os.makedirs(self.path, exist_ok=True)
+            vectors_path = self._file('vectors.bin')
+            # Eventuali righe scritte da un'esecuzione interrotta prima del commit delle chiavi
+            if os.path.exists(vectors_path):
+                os.truncate(vectors_path, len(self.keys) * (self.dim or 0) * self.dtype.itemsize)
+            try:
+                with open(vectors_path, 'ab') as f:
+                    for start in range(0, len(first), batch_size):
+                        batch = [texts[i] for i in first[start:start + batch_size]]
+                        vectors = np.asarray(encoder(batch), dtype=self.dtype)
+                        if self.dim is None:
+                            self.dim = vectors.shape[1]
+                        elif vectors.shape[1] != self.dim:
+                            raise ValueError(f'Vettori di dimensione {vectors.shape[1]}, lo store ha dimensione {self.dim}')
+                        f.write(np.ascontiguousarray(vectors).tobytes())
+                        written += len(batch)
+                    f.flush()
+                    os.fsync(f.fileno())
+            finally:
+                # Le chiavi si salvano dopo i vettori: un'interruzione conserva i batch già completati
+                if written:
+                    self._commit(np.concatenate([self.keys, new_keys[:written]]))
+        return self.lookup(keys)
+
+    def _commit(self, keys):
+        tmp_keys = self._file(f'keys.{os.getpid()}.tmp.npy')
+        np.save(tmp_keys, keys)
+        os.replace(tmp_keys, self._file('keys.npy'))
+        tmp_meta = self._file(f'meta.{os.getpid()}.tmp')
+        with open(tmp_meta, 'w') as f:
+            json.dump({'model': self.model_name, 'dim': self.dim, 'dtype': self.dtype.name}, f)
+        os.replace(tmp_meta, self._file('meta.json'))
+        self.reload()
+
+    def take(self, rows):
+        # Vettori delle righe indicate: se sono consecutive è una vista sulla memory-map, senza copie
+        rows = np.asarray(rows)
+        if (rows < 0).any():
+            raise KeyError('Testi non presenti nello store')
+        if len(rows) and rows[-1] - rows[0] == len(rows) - 1 and (np.diff(rows) == 1).all():
+            return self.vectors[rows[0]:rows[-1] + 1]
+        return self.vectors[rows]
+
+    def embed(self, texts, encoder, batch_size=BATCH_SIZE):
+        # Matrice allineata a texts, codificando prima i testi mancanti
+        return self.take(self.encode(texts, encoder, batch_size))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Calcola gli embedding degli statement mancanti nello store')
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--dtype', default='float16', choices=['float16', 'float32'])
+    args = parser.parse_args()
+
+    store = EmbeddingStore(args.model, dtype=args.dtype)
+    before = len(store)
+    statements = load_text(['statement'])['statement']
+    store.encode(statements, sbert_encoder(args.model), args.batch_size)
+    print(f'{len(store) - before} statement codificati, {len(store)} nello store {store.path}')
+
+
+if __name__ == '__main__':
+    main()
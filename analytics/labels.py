@@ -0,0 +1,3 @@
+# Label del LIAR dataset considerate disinformazione: pants-fire, false e mostly-false.
+# Modulo senza dipendenze, condiviso da dashboard, ingest e servizio di classificazione
+FAKE_LABELS = [0, 1, 2]
@@ -0,0 +1,264 @@
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from analytics.bert import MAX_LENGTH, MODEL_NAME, BertExtractor
+from analytics.labels import FAKE_LABELS
+
+# Stessi nomi del notebook classifier.ipynb
+LABEL_NAMES = ['pants-fire', 'false', 'mostly-false', 'half-true', 'mostly-true', 'true']
+
+MAX_BATCH_SIZE = 32
+# Attesa massima di una richiesta prima che il suo batch parta, anche se non è pieno
+MAX_WAIT_MS = 10
+# Richieste più recenti usate per percentili e throughput
+STATS_WINDOW = 10_000
+
+
+def load_classifier(path, threads=None):
+    # Classificatore salvato dal notebook: rete Keras (.keras/.h5) o RandomForest (.joblib).
+    # Restituisce una funzione embedding -> probabilità delle 6 label
+    if path.endswith(('.keras', '.h5')):
+        import tensorflow as tf
+
+        if threads:
+            tf.config.threading.set_intra_op_parallelism_threads(threads)
+        model = tf.keras.models.load_model(path)
+        # Chiamata diretta invece di model.predict, che per batch piccoli costa più della rete
+        return lambda embeddings: model(embeddings, training=False).numpy()
+
+    import joblib
+
+    model = joblib.load(path)
+
+    def predict_proba(embeddings):
+        probabilities = model.predict_proba(embeddings)
+        if isinstance(probabilities, list):
+            # Addestrato sulle label one-hot: una probabilità per colonna, da normalizzare
+            probabilities = np.stack([p[:, -1] for p in probabilities], axis=1)
+            total = probabilities.sum(axis=1, keepdims=True)
+            probabilities = np.divide(probabilities, total, out=np.full_like(probabilities, 1 / len(LABEL_NAMES)), where=total > 0)
+        return probabilities
+    return predict_proba
+
+
+class ServiceStats:
+    # Latenza (attesa in coda + inferenza) delle ultime richieste, dimensione dei batch e throughput
+
+    def __init__(self, window=STATS_WINDOW):
+        self._latency = deque(maxlen=window)
+        self._queue = deque(maxlen=window)
+        self._done = deque(maxlen=window)
+        self._batch_sizes = deque(maxlen=window)
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def record(self, arrivals, started, done, error=False):
+        with self._lock:
+            self.batches += 1
+            self.requests += len(arrivals)
+            if error:
+                self.errors += len(arrivals)
+                return
+            self._batch_sizes.append(len(arrivals))
+            for arrival in arrivals:
+                self._latency.append(done - arrival)
+                self._queue.append(started - arrival)
+                self._done.append(done)
+
+    def snapshot(self):
+        with self._lock:
+            latency = np.array(self._latency) * 1000
+            waits = np.array(self._queue) * 1000
+            done = np.array(self._done)
+            batch_sizes = np.array(self._batch_sizes)
+            elapsed = time.perf_counter() - self.started
+            stats = {
+                'requests': self.requests,
+                'batches': self.batches,
+                'errors': self.errors,
+                'uptime_s': round(elapsed, 1),
+                'throughput_rps': round(self.requests / elapsed, 2) if elapsed > 0 else 0.0,
+            }
+        if len(latency):
+            span = done.max() - done.min()
+            stats['recent_rps'] = round(len(done) / span, 2) if span > 0 else None
+            stats['batch_size_mean'] = round(float(batch_sizes.mean()), 2)
+            stats['batch_size_max'] = int(batch_sizes.max())
+            stats['latency_ms'] = _percentiles(latency)
+            stats['queue_ms'] = _percentiles(waits)
+        return stats
+
+
+def _percentiles(values):
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {'p50': round(p50, 2), 'p90': round(p90, 2), 'p99': round(p99, 2), 'max': round(float(values.max()), 2)}
+
+
+class MicroBatcher:
+    # Le richieste concorrenti finiscono in una coda; ogni worker prende la prima in attesa e
+    # aggiunge le successive finché il batch è pieno o scade max_wait_ms dall'arrivo della prima.
+    # Così con poco traffico la latenza aggiunta è limitata e con molto traffico i batch si riempiono
+
+    def __init__(self, predict, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS, workers=1):
+        self.predict = predict
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.stats = ServiceStats()
+        self._queue = queue.Queue()
+        self._workers = [threading.Thread(target=self._run, daemon=True) for _ in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, text):
+        future = Future()
+        self._queue.put((time.perf_counter(), text, future))
+        return future
+
+    def close(self):
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = item[0] + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    # Chiusura: il batch corrente viene comunque completato
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+
+            arrivals, texts, futures = zip(*batch)
+            started = time.perf_counter()
+            try:
+                probabilities = self.predict(list(texts))
+            except Exception as error:
+                self.stats.record(arrivals, started, time.perf_counter(), error=True)
+                for future in futures:
+                    future.set_exception(error)
+                continue
+            self.stats.record(arrivals, started, time.perf_counter())
+            for future, row in zip(futures, probabilities):
+                future.set_result(row)
+
+
+def prediction(probabilities):
+    probabilities = [float(p) for p in probabilities]
+    label = int(np.argmax(probabilities))
+    return {
+        'label': label,
+        'label_name': LABEL_NAMES[label],
+        'probabilities': dict(zip(LABEL_NAMES, probabilities)),
+        # Disinformazione: pants-fire, false e mostly-false, come la colonna disinfo
+        'disinfo': sum(probabilities[i] for i in FAKE_LABELS),
+    }
+
+
+class Server(ThreadingHTTPServer):
+    # Coda di connessioni più lunga del default (5): con molti client concorrenti le connessioni in più
+    # verrebbero rifiutate invece di aspettare il proprio batch
+    request_queue_size = 256
+    daemon_threads = True
+
+
+def make_handler(batcher):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/stats':
+                self._send(200, batcher.stats.snapshot())
+            elif self.path == '/health':
+                self._send(200, {'status': 'ok'})
+            else:
+                self._send(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if self.path != '/predict':
+                self._send(404, {'error': 'not found'})
+                return
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                statements = body['statements'] if 'statements' in body else [body['statement']]
+                if not all(isinstance(statement, str) for statement in statements):
+                    raise TypeError
+            except (ValueError, KeyError, TypeError):
+                self._send(400, {'error': 'atteso {"statement": "..."} oppure {"statements": ["...", ...]}'})
+                return
+            # Ogni statement entra nella coda da solo: quelli di richieste diverse possono condividere un batch
+            futures = [batcher.submit(statement) for statement in statements]
+            try:
+                predictions = [prediction(future.result()) for future in futures]
+            except Exception as error:
+                self._send(500, {'error': str(error)})
+                return
+            self._send(200, {'predictions': predictions})
+
+        def _send(self, status, payload):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servizio HTTP locale di classificazione degli statement')
+    parser.add_argument('classifier', help='classificatore salvato dal notebook (.keras, .h5 o .joblib)')
+    parser.add_argument('--encoder', default=MODEL_NAME)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8060)
+    parser.add_argument('--max-batch-size', type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument('--max-wait-ms', type=float, default=MAX_WAIT_MS)
+    parser.add_argument('--workers', type=int, default=1, help='thread che eseguono i batch')
+    parser.add_argument('--threads', type=int, default=None, help='thread intra-op di torch e del classificatore')
+    parser.add_argument('--max-length', type=int, default=MAX_LENGTH)
+    args = parser.parse_args()
+
+    # Un micro-batch è già un batch di BERT, riempito fino allo statement più lungo
+    encoder = BertExtractor(args.encoder, args.max_length, args.max_batch_size, args.threads)
+    classify = load_classifier(args.classifier, args.threads)
+    batcher = MicroBatcher(
+        lambda texts: classify(encoder(texts)),
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+        workers=args.workers,
+    )
+    server = Server((args.host, args.port), make_handler(batcher))
+    print(f'Servizio in ascolto su http://{args.host}:{args.port} (POST /predict, GET /stats)')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+# Righe lette per volta dagli embedding (anche memory-map float16)
+BLOCK_SIZE = 65536
+# Memoria per thread della matrice delle distanze di un blocco di righe con tutte le altre
+BLOCK_BYTES = 64 * 2**20
+N_JOBS = os.cpu_count() or 1
+
+
+def _classes(labels):
+    classes, codes = np.unique(np.asarray(labels), return_inverse=True)
+    return classes, codes, np.bincount(codes, minlength=len(classes))
+
+
+def _normalized(block):
+    block = np.asarray(block, dtype='float32')
+    norms = np.linalg.norm(block, axis=1, keepdims=True)
+    return block / np.where(norms > 0, norms, 1)
+
+
+def class_sums(embeddings, labels):
+    # Somma dei vettori normalizzati di ogni classe, letta a blocchi: memoria O(k·d)
+    classes, codes, counts = _classes(labels)
+    sums = np.zeros((len(classes), embeddings.shape[1]))
+    for start in range(0, len(codes), BLOCK_SIZE):
+        onehot = codes[start:start + BLOCK_SIZE, None] == np.arange(len(classes))
+        sums += onehot.T @ _normalized(embeddings[start:start + BLOCK_SIZE])
+    return classes, codes, sums, counts
+
+
+def class_similarity(embeddings, labels):
+    # Similarità coseno media fra le coppie (a, b) con a nella classe i e b nella classe j, compreso
+    # ogni vettore con sé stesso come in cosine_similarity(X).mean(). Con vettori normalizzati la
+    # media dei prodotti scalari è il prodotto delle somme: S_i · S_j / (n_i · n_j), senza matrici n×n
+    classes, _, sums, counts = class_sums(embeddings, labels)
+    similarity = (sums @ sums.T) / np.outer(counts, counts)
+    return pd.DataFrame(similarity, index=classes, columns=classes)
+
+
+def silhouette_samples(embeddings, labels, rows=None, metric='cosine', n_jobs=N_JOBS):
+    # Silhouette di ogni riga in rows (default: tutte) rispetto all'intero dataset, come
+    # sklearn.metrics.silhouette_samples. Con metric='cosine' la distanza media da una classe è
+    # lineare nei vettori e si ricava dalle somme di classe: O(n·k·d) e nessuna matrice di distanze.
+    # Con metric='euclidean' le distanze si calcolano a blocchi di righe in più thread
+    classes, codes, counts = _classes(labels)
+    rows = np.arange(len(codes)) if rows is None else np.asarray(rows)
+    if metric == 'cosine':
+        _, _, sums, _ = class_sums(embeddings, labels)
+        distances = np.concatenate([
+            counts - _normalized(embeddings[rows[start:start + BLOCK_SIZE]]) @ sums.T
+            for start in range(0, len(rows), BLOCK_SIZE)
+        ]) if len(rows) else np.zeros((0, len(classes)))
+    elif metric == 'euclidean':
+        distances = _euclidean_sums(embeddings, codes, len(classes), rows, n_jobs)
+    else:
+        raise ValueError(f'Metrica non supportata: {metric}')
+    return _silhouette(distances, codes[rows], counts)
+
+
+def _euclidean_sums(embeddings, codes, n_classes, rows, n_jobs):
+    # Somma delle distanze di ogni riga di rows dalle righe di ogni classe
+    data = np.asarray(embeddings, dtype='float32')
+    squared = np.einsum('ij,ij->i', data, data)
+    onehot = (codes[:, None] == np.arange(n_classes)).astype('float32')
+    block_size = max(1, BLOCK_BYTES // (4 * max(len(data), 1)))
+
+    def block(start):
+        part = rows[start:start + block_size]
+        gram = data[part] @ data.T
+        distances = np.sqrt(np.maximum(squared[part, None] + squared[None, :] - 2 * gram, 0))
+        # La distanza di una riga da sé stessa è 0, anche con gli errori di arrotondamento
+        distances[np.arange(len(part)), part] = 0
+        return distances.astype('float64') @ onehot
+
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        parts = list(executor.map(block, range(0, len(rows), block_size)))
+    return np.concatenate(parts) if parts else np.zeros((0, n_classes))
+
+
+def _silhouette(distances, own, counts):
+    # distances: somma delle distanze di ogni riga dalle righe di ogni classe (riga stessa a distanza 0)
+    n = np.arange(len(own))
+    own_size = counts[own]
+    a = distances[n, own] / np.maximum(own_size - 1, 1)
+    others = distances / np.where(counts > 0, counts, 1)
+    others[n, own] = np.inf
+    b = others.min(axis=1)
+    s = (b - a) / np.maximum(np.maximum(a, b), np.finfo('float64').tiny)
+    # Come in sklearn: 0 per le classi con un solo elemento
+    return np.where(own_size > 1, s, 0)
+
+
+def silhouette(embeddings, labels, metric='cosine', n_jobs=N_JOBS):
+    return float(silhouette_samples(embeddings, labels, metric=metric, n_jobs=n_jobs).mean())
+
+
+def silhouette_estimate(embeddings, labels, sample_size=2000, metric='euclidean', confidence=0.95, seed=0, n_jobs=N_JOBS):
+    # Stima del silhouette da un campione stratificato per classe: ogni riga campionata ha il valore
+    # esatto (distanze da tutto il dataset), la media è pesata per la dimensione delle classi.
+    # Restituisce (stima, limite inferiore, limite superiore) dell'intervallo di confidenza
+    classes, codes, counts = _classes(labels)
+    rng = np.random.default_rng(seed)
+    n = len(codes)
+    rows = []
+    for c in range(len(classes)):
+        members = np.flatnonzero(codes == c)
+        size = min(len(members), max(2, round(sample_size * len(members) / n)))
+        rows.append(rng.choice(members, size=size, replace=False))
+    values = silhouette_samples(embeddings, labels, np.concatenate(rows), metric, n_jobs)
+
+    estimate, variance, start = 0.0, 0.0, 0
+    for c, sample in enumerate(rows):
+        part = values[start:start + len(sample)]
+        start += len(sample)
+        weight = counts[c] / n
+        estimate += weight * part.mean()
+        if len(part) > 1:
+            # Varianza della media con la correzione per popolazione finita
+            variance += weight**2 * part.var(ddof=1) / len(part) * (1 - len(part) / counts[c])
+    margin = NormalDist().inv_cdf(0.5 + confidence / 2) * np.sqrt(variance)
+    return float(estimate), float(estimate - margin), float(estimate + margin)
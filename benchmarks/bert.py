@@ -0,0 +1,81 @@
+import argparse
+import json
+import platform
+import time
+
+import numpy as np
+
+from analytics.bert import BATCH_SIZE, MAX_LENGTH, MODEL_NAME, BertExtractor
+from dashboards.dataset import load_text
+
+
+def fixed_padding(extractor, texts):
+    # Estrazione come nella versione originale di embedding_function: padding a max_length,
+    # batch nell'ordine del dataset e torch.no_grad
+    torch = extractor.torch
+    encodings = extractor.tokenizer(texts, padding='max_length', max_length=extractor.max_length, truncation=True, return_tensors='pt')
+    embeddings = []
+    with torch.no_grad():
+        for start in range(0, len(texts), extractor.batch_size):
+            output = extractor.model(
+                input_ids=encodings['input_ids'][start:start + extractor.batch_size].to(extractor.device),
+                attention_mask=encodings['attention_mask'][start:start + extractor.batch_size].to(extractor.device),
+            )
+            embeddings.append(output.pooler_output.cpu().numpy())
+    return np.concatenate(embeddings)
+
+
+def padded_tokens(extractor, texts):
+    # Token elaborati da BERT, padding compreso, con i batch per lunghezza e con il padding fisso
+    lengths = np.sort([len(ids) for ids in extractor.tokenizer(texts, truncation=True, max_length=extractor.max_length)['input_ids']])
+    bucketed = sum(int(lengths[start:start + extractor.batch_size].max()) * len(lengths[start:start + extractor.batch_size])
+                   for start in range(0, len(lengths), extractor.batch_size))
+    return bucketed, len(lengths) * extractor.max_length
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tempo di estrazione degli embedding BERT: padding fisso contro batch per lunghezza')
+    parser.add_argument('--model', default=MODEL_NAME)
+    parser.add_argument('--limit', type=int, default=None, help='primi N statement (default: tutto il dataset)')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--max-length', type=int, default=MAX_LENGTH)
+    parser.add_argument('--threads', type=int, default=None, help='thread intra-op di torch')
+    parser.add_argument('--device', default='cpu')
+    parser.add_argument('--output', default='bert-results.json')
+    args = parser.parse_args()
+
+    texts = load_text(['statement'])['statement'].astype(str).tolist()[:args.limit]
+    extractor = BertExtractor(args.model, args.max_length, args.batch_size, args.threads, args.device)
+
+    start = time.perf_counter()
+    baseline = fixed_padding(extractor, texts)
+    fixed_s = time.perf_counter() - start
+    start = time.perf_counter()
+    embeddings = extractor(texts)
+    bucketed_s = time.perf_counter() - start
+
+    bucketed_tokens, fixed_tokens = padded_tokens(extractor, texts)
+    results = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'threads': extractor.torch.get_num_threads(),
+        'statements': len(texts),
+        'batch_size': args.batch_size,
+        'max_length': args.max_length,
+        'fixed_padding_s': round(fixed_s, 2),
+        'bucketed_s': round(bucketed_s, 2),
+        'speedup': round(fixed_s / bucketed_s, 2),
+        'fixed_padding_tokens': fixed_tokens,
+        'bucketed_tokens': bucketed_tokens,
+        # Le posizioni mascherate non cambiano il risultato: restano solo differenze di arrotondamento
+        'max_abs_diff': float(np.abs(baseline - embeddings).max()),
+    }
+    print(f"{len(texts)} statement: padding fisso {fixed_s:.1f} s, batch per lunghezza {bucketed_s:.1f} s "
+          f"(x{results['speedup']}, token {bucketed_tokens / fixed_tokens:.0%}), differenza massima {results['max_abs_diff']:.2e}")
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'Risultati scritti in {args.output}')
+
+
+if __name__ == '__main__':
+    main()
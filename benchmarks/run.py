@@ -0,0 +1,203 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.generate import generate
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def callback_inputs(registry):
+    # Input realistici per ogni callback della dashboard, ricavati dai dati caricati
+    cube = registry.get('speaker_cube')
+    date_range = registry.get('date_slider')['date_range']
+    options = registry.get('filter_options')
+    first_year, last_year = options['years']
+    speakers = cube.speakers[:5] + cube.speakers[-5:]
+    # Filtri della barra comune: un tema frequente, speaker e anni, contesto e label
+    filter_sets = [
+        {'subject': options['subject'][:2]},
+        {'speaker': options['speaker'][:3], 'year': list(range(last_year - 2, last_year + 1))},
+        {'context': options['context'][:1], 'label': [0, 1, 2]},
+    ]
+    no_filters = [None] + filter_sets
+    return {
+        'render_tab_content': [(tab_id,) for tab_id in ['scatter', 'line', 'veridicita', 'context', 'subject']],
+        'update_figure': [(year,) for year in cube.years] + [
+            (year, None, credibility) for year in cube.years[-3:] for credibility in ('cumulative', 'year')
+        ] + [(year, filters) for year in cube.years[-2:] for filters in filter_sets],
+        'search_speakers': [(query, cube.most_frequent_speaker) for query in ['a', 'sp', speakers[-1][:4], speakers[-1]]],
+        'update_speaker_graph': [(speaker, filters) for speaker in speakers[:3] for filters in no_filters],
+        'update_histogram': [(n, filters) for n in (10, 50, 200) for filters in no_filters],
+        'update_veridicita_graph': [
+            ([0, date_range],),
+            ([date_range // 2, date_range],),
+            ([date_range - 365, date_range],),
+        ] + [([0, date_range], None, window, weighting) for window in (7, 365) for weighting in ('statement', 'day')] + [
+            ([0, date_range], filters, 30, 'statement') for filters in filter_sets
+        ],
+        'update_context_histogram': [(n, filters) for n in (10, 50, 200) for filters in no_filters],
+        'update_subject_histogram': [(n, filters) for n in (10, 50, 200) for filters in no_filters],
+        # Soglia di supporto, categorie per pagina, pagina, filtri
+        'update_speaker_heatmap': [(50, 30, 1), (5, 30, 2), (5, 200, 1)] + [(5, 30, 1, filters) for filters in filter_sets],
+        'update_context_heatmap': [(50, 30, 1), (5, 30, 2), (5, 200, 1)] + [(5, 30, 1, filters) for filters in filter_sets],
+        'update_subject_heatmap': [(50, 30, 1), (5, 30, 2), (5, 200, 1)] + [(5, 30, 1, filters) for filters in filter_sets],
+        # Barra dei filtri: speaker, temi, contesti, intervallo di anni, label
+        'update_filters': [
+            (None, None, None, [first_year, last_year], [0, 1, 2, 3, 4, 5]),
+            (options['speaker'][:3], options['subject'][:2], None, [last_year - 2, last_year], [0, 1, 2]),
+        ],
+        'update_summary': [(filters,) for filters in [{}] + filter_sets],
+        'search_speaker_filter': [(query, None) for query in ['a', speakers[-1][:4], speakers[-1]]],
+        'search_subject_filter': [(query, options['subject'][:1]) for query in ['a', options['subject'][-1][:3]]],
+        'search_context_filter': [(query, None) for query in ['a', options['context'][-1][:3]]],
+    }
+
+
+def peak_rss_mb():
+    # ru_maxrss sopravvive all'exec e includerebbe il picco del processo padre (il generatore):
+    # su Linux VmHWM riguarda solo lo spazio di indirizzi corrente
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(repeat):
+    # Eseguito in un processo separato: avvio, picco RSS e latenza delle callback
+    start = time.perf_counter()
+    import dashboard  # noqa: F401
+    import_seconds = time.perf_counter() - start
+
+    from dashboards.data import registry
+    from dashboards.tabs import TABS, filters, render_tab_content, warm
+
+    start = time.perf_counter()
+    warm(TABS)
+    warm_seconds = time.perf_counter() - start
+
+    callbacks = {'render_tab_content': render_tab_content}
+    for _, _, callback in filters.CALLBACKS:
+        callbacks[callback.__name__] = callback
+    for tab in TABS.values():
+        for _, _, callback in tab.callbacks:
+            callbacks[callback.__name__] = callback
+
+    latencies = {}
+    for name, inputs in callback_inputs(registry).items():
+        # __wrapped__ salta la cache delle figure: si misura il costo reale della callback
+        function = getattr(callbacks[name], '__wrapped__', callbacks[name])
+        samples = []
+        for _ in range(repeat):
+            for args in inputs:
+                start = time.perf_counter()
+                function(*args)
+                samples.append((time.perf_counter() - start) * 1000)
+        latencies[name] = {
+            'p50_ms': float(np.percentile(samples, 50)),
+            'p95_ms': float(np.percentile(samples, 95)),
+            'calls': len(samples),
+        }
+
+    return {
+        'rows': len(registry.get('dataset')),
+        'import_seconds': import_seconds,
+        'warm_seconds': warm_seconds,
+        'startup_seconds': import_seconds + warm_seconds,
+        'peak_rss_mb': peak_rss_mb(),
+        'callbacks': latencies,
+    }
+
+
+def run_child(csv_path, repeat):
+    env = dict(os.environ, LIAR_DATASET_CSV=csv_path)
+    env.pop('DASHBOARD_CACHE_DIR', None)
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.run', '--child', '--repeat', str(repeat)],
+        cwd=ROOT, env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous_path, results):
+    with open(previous_path) as f:
+        previous = {run['scale']: run for run in json.load(f)['runs']}
+    for run in results['runs']:
+        old = previous.get(run['scale'])
+        if old is None:
+            continue
+        print(f"scala {run['scale']}x")
+        for key in ('cold_startup_seconds', 'startup_seconds', 'peak_rss_mb'):
+            print(f'  {key:<28} {old[key]:10.3f} -> {run[key]:10.3f} ({run[key] / old[key]:.2f}x)')
+        for name, stats in run['callbacks'].items():
+            if name in old['callbacks']:
+                before = old['callbacks'][name]['p95_ms']
+                print(f"  {name + ' p95 ms':<28} {before:10.3f} -> {stats['p95_ms']:10.3f} ({stats['p95_ms'] / before:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark della dashboard su dataset sintetici')
+    parser.add_argument('--scales', type=float, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--skew', type=float, default=1.1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--compare', help='risultati precedenti da confrontare')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.repeat)))
+        return
+
+    results = {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'runs': [],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            csv_path = os.path.join(tmp, f'liar_{scale:g}x.csv')
+            generate(csv_path, scale=scale, skew=args.skew, seed=args.seed)
+
+            # Primo avvio senza cache Arrow, poi avvio normale
+            cold = run_child(csv_path, repeat=1)
+            run = run_child(csv_path, repeat=args.repeat)
+            run.update(scale=scale, skew=args.skew, cold_startup_seconds=cold['startup_seconds'])
+            results['runs'].append(run)
+            print(f"{scale:g}x: {run['rows']} righe, avvio {run['startup_seconds']:.2f}s "
+                  f"(a freddo {run['cold_startup_seconds']:.2f}s), picco RSS {run['peak_rss_mb']:.0f} MB")
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'Risultati scritti in {args.output}')
+
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == '__main__':
+    main()
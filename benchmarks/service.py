@@ -0,0 +1,75 @@
+import argparse
+import json
+import threading
+import time
+import urllib.request
+
+import numpy as np
+
+from dashboards.dataset import load_text
+
+
+def post(url, statement):
+    request = urllib.request.Request(
+        f'{url}/predict', data=json.dumps({'statement': statement}).encode(), headers={'Content-Type': 'application/json'}
+    )
+    with urllib.request.urlopen(request) as response:
+        response.read()
+
+
+def load(url, statements, concurrency, n_requests):
+    # n_requests statement inviati da `concurrency` client che aspettano ognuno la propria risposta
+    latencies = []
+    lock = threading.Lock()
+    counter = iter(range(n_requests))
+
+    def client():
+        for i in counter:
+            start = time.perf_counter()
+            post(url, statements[i % len(statements)])
+            with lock:
+                latencies.append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'throughput_rps': len(latencies) / elapsed,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p90_ms': float(np.percentile(latencies, 90)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Throughput e latenza del servizio di classificazione (python -m analytics.service)')
+    parser.add_argument('--url', default='http://127.0.0.1:8060')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--requests', type=int, default=500, help='richieste per livello di concorrenza')
+    parser.add_argument('--output', default='service-results.json')
+    args = parser.parse_args()
+
+    statements = load_text(['statement'])['statement'].astype(str).tolist()
+    results = {'url': args.url, 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'runs': []}
+    for concurrency in args.concurrency:
+        run = load(args.url, statements, concurrency, args.requests)
+        # Statistiche del servizio: dimensione media dei batch e tempo passato in coda
+        with urllib.request.urlopen(f'{args.url}/stats') as response:
+            run['service'] = json.loads(response.read())
+        results['runs'].append(run)
+        print(f"{concurrency} client: {run['throughput_rps']:.1f} richieste/s, p50 {run['p50_ms']:.1f} ms, "
+              f"p99 {run['p99_ms']:.1f} ms, batch medio {run['service'].get('batch_size_mean')}")
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'Risultati scritti in {args.output}')
+
+
+if __name__ == '__main__':
+    main()
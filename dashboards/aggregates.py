@@ -0,0 +1,282 @@
+import bisect
+import copy
+
+import numpy as np
+import pandas as pd
+
+from analytics.labels import FAKE_LABELS
+
+LABELS = [0, 1, 2, 3, 4, 5]
+# Label mostly-true e true: le stesse colonne da cui è calcolato credibility_score
+CREDIBLE_LABELS = [4, 5]
+MIN_YEAR = 2007
+TOP_SPEAKERS = 30
+# Risultati restituiti dalla ricerca nei menu a tendina
+SEARCH_LIMIT = 20
+SEPARATOR = '\n'
+
+
+class SpeakerCube:
+    # Conteggi (speaker, anno, label) calcolati una sola volta al caricamento:
+    # le callback leggono solo le righe che servono al grafico
+
+    def __init__(self, df):
+        self.counts, self._credibility = self._group(df)
+        self._derive()
+
+    @staticmethod
+    def _group(df):
+        data = df[['speaker', 'label', 'credibility_score']].assign(year=df['date'].dt.year.astype('int16'))
+        counts = (
+            data.groupby(['speaker', 'year', 'label'], observed=True)
+            .size()
+            .unstack('label', fill_value=0)
+            .reindex(columns=LABELS, fill_value=0)
+            .astype('int32')
+        )
+        # Somma e numero dei credibility_score: la media si aggiorna sommando i batch
+        credibility = data.groupby(['speaker', 'year'], observed=True)['credibility_score'].agg(['sum', 'count'])
+        return _plain(counts).sort_index(), _plain(credibility)
+
+    def _derive(self, keys=None):
+        # Con keys (gruppi toccati da un batch) si ricalcolano solo le righe e gli anni interessati
+        counts = self.counts if keys is None else self.counts.loc[keys]
+        credibility = self._credibility if keys is None else self._credibility.loc[keys]
+        by_speaker_year = pd.DataFrame({
+            'total': counts.sum(axis=1),
+            'disinfo': counts[FAKE_LABELS].sum(axis=1),
+            'credibility_score': (credibility['sum'] / credibility['count']).astype('float32'),
+        })
+        by_speaker = by_speaker_year[['total', 'disinfo']].groupby(level='speaker', observed=True).sum()
+        recent = by_speaker_year[by_speaker_year.index.get_level_values('year') >= MIN_YEAR]
+        recent_totals = recent['total'].groupby(level='speaker', observed=True).sum()
+
+        if keys is None:
+            self.by_speaker_year = by_speaker_year.sort_index()
+            self.by_speaker = by_speaker
+            self.recent_totals = recent_totals
+            self.top_by_year = {}
+        else:
+            # I totali per speaker si aggiornano con la differenza rispetto ai valori precedenti
+            previous = self.by_speaker_year.reindex(by_speaker_year.index, fill_value=0)
+            delta = (by_speaker_year[['total', 'disinfo']] - previous[['total', 'disinfo']]).astype('int64')
+            self.by_speaker_year = _assign(self.by_speaker_year, by_speaker_year)
+            self.by_speaker = _add(self.by_speaker, delta.groupby(level='speaker', observed=True).sum())
+            recent_delta = delta[delta.index.get_level_values('year') >= MIN_YEAR]
+            self.recent_totals = _add(self.recent_totals, recent_delta['total'].groupby(level='speaker', observed=True).sum())
+            self.top_by_year = dict(self.top_by_year)
+
+        # Classifica dei primi speaker per ogni anno, già pronta per lo scatter. I conteggi
+        # crescono soltanto: dopo un batch basta confrontare la classifica precedente con i gruppi toccati
+        rows = recent.reset_index()
+        rows = pd.DataFrame({
+            'year': rows['year'].astype(int),
+            'speaker': rows['speaker'].astype(str),
+            'frequenza': rows['total'],
+            'credibility_score': rows['credibility_score'],
+        })
+        years = rows['year'].unique()
+        previous = [self.top_by_year[year].assign(year=year) for year in years if year in self.top_by_year]
+        if previous:
+            rows = pd.concat(previous + [rows], ignore_index=True).drop_duplicates(['year', 'speaker'], keep='last')
+        rows = rows.sort_values(['year', 'frequenza', 'speaker'], ascending=[True, False, True])
+        for year, top in rows.groupby('year').head(TOP_SPEAKERS).groupby('year'):
+            self.top_by_year[int(year)] = top[['speaker', 'frequenza', 'credibility_score']].reset_index(drop=True)
+        self.years = sorted(self.top_by_year)
+
+        if keys is None:
+            self.speakers = sorted(self.recent_totals.index)
+        else:
+            self.speakers = list(self.speakers)
+            for speaker in recent_totals.index:
+                position = bisect.bisect_left(self.speakers, speaker)
+                if position == len(self.speakers) or self.speakers[position] != speaker:
+                    self.speakers.insert(position, speaker)
+        self.most_frequent_speaker = self.recent_totals.idxmax()
+
+    def add(self, batch):
+        # Nuovo cubo con le righe del batch: si sommano i conteggi dei soli gruppi toccati,
+        # l'oggetto originale resta valido per le callback in corso
+        counts, credibility = self._group(batch)
+        cube = copy.copy(self)
+        cube.counts = _add(self.counts, counts)
+        cube._credibility = _add(self._credibility, credibility)
+        cube._derive(keys=counts.index)
+        return cube
+
+    def year_top(self, year):
+        return self.top_by_year.get(year, pd.DataFrame(columns=['speaker', 'frequenza', 'credibility_score']))
+
+    def speaker_years(self, speaker):
+        if speaker not in self.by_speaker.index:
+            return pd.DataFrame(columns=['year', 'total_statements', 'fake_statements'])
+        rows = self.by_speaker_year.loc[speaker]
+        rows = rows[rows.index >= MIN_YEAR]
+        return pd.DataFrame({
+            'year': rows.index.astype(int),
+            'total_statements': rows['total'].to_numpy(),
+            'fake_statements': rows['disinfo'].to_numpy(),
+        })
+
+
+class DisinfoTable:
+    # Conteggi (categoria, disinformazione/verità) ordinati per numero di statement di disinformazione
+
+    def __init__(self, df, column):
+        self.column = column
+        self._sort(self._group(df))
+
+    @classmethod
+    def from_counts(cls, counts, column):
+        # Conteggi già aggregati (es. dal motore dei filtri) con lo stesso ordinamento
+        table = cls.__new__(cls)
+        table.column = column
+        table._sort(counts[['disinformation', 'truth']].copy())
+        return table
+
+    def _group(self, df):
+        counts = (
+            df.groupby([self.column, 'disinfo'], observed=True)
+            .size()
+            .unstack('disinfo', fill_value=0)
+            .reindex(columns=[1, 0], fill_value=0)
+            .astype('int32')
+        )
+        counts.columns = ['disinformation', 'truth']
+        return _plain(counts)
+
+    def _sort(self, counts):
+        counts['total'] = counts['disinformation'] + counts['truth']
+        # A parità di conteggio l'ordine è alfabetico, indipendente da come sono arrivate le righe
+        counts = counts.sort_index()
+        self.counts = counts.sort_values('disinformation', ascending=False, kind='stable')
+        self.order = self.counts.index[self.counts['disinformation'] > 0].tolist()
+
+    def add(self, batch):
+        table = copy.copy(self)
+        table._sort(_add(self.counts[['disinformation', 'truth']], self._group(batch)))
+        return table
+
+    def top(self, n):
+        if n is None:
+            n = len(self.order)
+        return self.counts.iloc[:min(n, len(self.order))]
+
+
+class RatioRanking:
+    # Categorie di un DisinfoTable ordinate per proporzione di disinformazione (decrescente, a
+    # parità alfabetico) e, separatamente, per supporto (numero di statement). Le categorie con
+    # supporto >= soglia sono un suffisso dell'ordine per supporto: una ricerca binaria, poi le
+    # loro posizioni nell'ordine per proporzione danno direttamente la pagina richiesta
+
+    def __init__(self, counts):
+        counts = counts[counts['total'] > 0].sort_index()
+        ratio = (counts['disinformation'] / counts['total']).to_numpy()
+        by_ratio = np.argsort(-ratio, kind='stable')
+        self.names = counts.index.to_numpy()[by_ratio]
+        self.ratios = ratio[by_ratio]
+        self.totals = counts['total'].to_numpy()[by_ratio]
+        self._by_support = np.argsort(self.totals, kind='stable')
+        self._supports = self.totals[self._by_support]
+
+    def count(self, min_support):
+        return len(self._supports) - int(np.searchsorted(self._supports, min_support, side='left'))
+
+    def top(self, min_support, n, offset=0):
+        # Righe [offset, offset + n) delle categorie con supporto >= min_support, per proporzione
+        start = np.searchsorted(self._supports, min_support, side='left')
+        positions = self._by_support[start:]
+        end = min(offset + n, len(positions))
+        if end < len(positions):
+            # Basta la selezione parziale delle prime `end` posizioni, senza ordinare tutto
+            positions = np.partition(positions, end - 1)[:end] if end > 0 else positions[:0]
+        page = np.sort(positions)[offset:end]
+        return pd.DataFrame(
+            {'disinfo_ratio': self.ratios[page], 'total': self.totals[page]},
+            index=pd.Index(self.names[page], name='category'),
+        )
+
+
+class SearchIndex:
+    # Ricerca per nome nei menu a tendina (speaker, temi, contesti): i nomi in minuscolo
+    # sono concatenati in un'unica stringa in ordine di numero di statement, quindi le prime
+    # occorrenze trovate con str.find sono già le più frequenti e la ricerca si ferma dopo k risultati
+
+    def __init__(self, totals):
+        totals = _ranked(totals)
+        self.names = list(totals.index)
+        self.counts = totals.to_numpy()
+        normalized = [_normalize(name) for name in self.names]
+        self._text = SEPARATOR + ''.join(name + SEPARATOR for name in normalized)
+        # Inizio di ogni nome nel testo, più la posizione finale come sentinella
+        self._starts = []
+        position = len(SEPARATOR)
+        for name in normalized:
+            self._starts.append(position)
+            position += len(name) + len(SEPARATOR)
+        self._starts.append(position)
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        # Prima i nomi che iniziano con la ricerca, poi quelli che la contengono
+        query = _normalize(query or '')
+        if not query:
+            return self.names[:limit]
+        found = self._find(SEPARATOR + query, limit)
+        if len(found) < limit:
+            found += [i for i in self._find(query, limit + len(found)) if i not in found][:limit - len(found)]
+        return [self.names[i] for i in found]
+
+    def _find(self, pattern, limit):
+        found = []
+        position = self._text.find(pattern)
+        while position >= 0 and len(found) < limit:
+            # L'ultimo carattere trovato appartiene al nome i; si riparte dal separatore che lo chiude
+            i = bisect.bisect_right(self._starts, position + len(pattern) - 1) - 1
+            found.append(i)
+            position = self._text.find(pattern, self._starts[i + 1] - len(SEPARATOR))
+        return found
+
+
+def top_names(totals, limit=SEARCH_LIMIT):
+    # Risultati della ricerca vuota di SearchIndex(totals), senza costruire l'indice
+    return list(_ranked(totals).index[:limit])
+
+
+def _ranked(totals):
+    # Nomi con almeno uno statement, dal più frequente; a parità in ordine alfabetico
+    totals = pd.Series(totals.to_numpy(), index=totals.index.astype(str))
+    return totals[totals > 0].sort_index().sort_values(ascending=False, kind='stable')
+
+
+def _plain(table):
+    # Indici con stringhe semplici invece di categorie: i dizionari delle categorie cambiano
+    # fra dataset e batch, e confrontare indici categorici diversi è lento
+    index = table.index
+    if isinstance(index, pd.MultiIndex):
+        levels = [level.astype(str) if isinstance(level, pd.CategoricalIndex) else level for level in index.levels]
+        table.index = index.set_levels(levels)
+    elif isinstance(index, pd.CategoricalIndex):
+        table.index = index.astype(str)
+    return table
+
+
+def _normalize(name):
+    return name.casefold().replace(SEPARATOR, ' ')
+
+
+def _add(table, delta):
+    # Somma per indice: le chiavi nuove del batch vengono aggiunte, le altre restano invariate
+    if isinstance(table, pd.Series):
+        return _add(table.to_frame(), delta.to_frame())[table.name]
+    return _assign(table, table.reindex(delta.index, fill_value=0)[delta.columns] + delta)
+
+
+def _assign(table, rows):
+    # Copia di table con le righe di rows sostituite o aggiunte (in ordine di indice)
+    positions = table.index.get_indexer(rows.index)
+    new = positions < 0
+    result = table.copy()
+    result.iloc[positions[~new], [table.columns.get_loc(column) for column in rows.columns]] = rows[~new].to_numpy()
+    if new.any():
+        result = pd.concat([result, rows[new].astype(table.dtypes)]).sort_index()
+    return result.astype(table.dtypes)
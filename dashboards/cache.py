@@ -0,0 +1,157 @@
+import functools
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+
+def normalize(value):
+    # Input equivalenti (10 e 10.0, liste e tuple) devono produrre la stessa chiave
+    if isinstance(value, (list, tuple)):
+        return tuple(normalize(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, normalize(item)) for key, item in value.items()))
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+class FigureCache:
+    # Cache LRU degli output delle callback, limitata in byte, con backend su disco
+    # opzionale condiviso fra i worker. version (stringa o funzione) fa parte di ogni
+    # chiave: le figure di un'altra versione del dataset non vengono mai restituite
+
+    def __init__(self, max_bytes=64 * 2**20, directory=None, max_disk_bytes=512 * 2**20, version=''):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.version = version
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def current_version(self):
+        return self.version() if callable(self.version) else self.version
+
+    def key(self, name, args, kwargs):
+        return (name, normalize(args), normalize(kwargs), self.current_version())
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[0]
+
+        if self.directory:
+            try:
+                with open(self._disk_path(key), 'rb') as f:
+                    payload = f.read()
+            except OSError:
+                pass
+            else:
+                value = pickle.loads(payload)
+                self._store(key, value, len(payload))
+                with self._lock:
+                    self.disk_hits += 1
+                return True, value
+
+        with self._lock:
+            self.misses += 1
+        return False, None
+
+    def set(self, key, value):
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self._store(key, value, len(payload))
+        if self.directory:
+            self._write_disk(key, payload)
+
+    def memoize(self, func):
+        name = f'{func.__module__}.{func.__qualname__}'
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = self.key(name, args, kwargs)
+            found, value = self.get(key)
+            if found:
+                return value
+            value = func(*args, **kwargs)
+            self.set(key, value)
+            return value
+
+        return wrapper
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def evict_other_versions(self, version=None):
+        # Libera subito la memoria delle figure delle versioni precedenti
+        version = self.current_version() if version is None else version
+        with self._lock:
+            for key in [key for key in self._entries if key[-1] != version]:
+                _, size = self._entries.pop(key)
+                self._size -= size
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+            }
+
+    def _store(self, key, value, size):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[1]
+            self._entries[key] = (value, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= evicted
+
+    def _disk_path(self, key):
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        return os.path.join(self.directory, f'{digest}.pkl')
+
+    def _write_disk(self, key, payload):
+        path = self._disk_path(key)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+            self._prune_disk()
+        except OSError:
+            pass
+
+    def _prune_disk(self):
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.pkl'):
+                stat = entry.stat()
+                files.append((stat.st_atime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
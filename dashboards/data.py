@@ -0,0 +1,218 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from analytics.ann import IVFIndex, index_path
+from dashboards.aggregates import MIN_YEAR, DisinfoTable, RatioRanking, SearchIndex, SpeakerCube, top_names
+from dashboards.cache import FigureCache
+from dashboards.dataset import dataset_version, load_dataset, source_digest
+from dashboards.query import QueryEngine
+from dashboards.registry import DataRegistry
+from dashboards.timeseries import MAX_POINTS, WINDOWS, CalendarSeries, SpeakerTimeline, min_periods
+
+# Le colonne testuali lunghe (statement, justification) non servono alla dashboard
+DASHBOARD_COLUMNS = ['label', 'speaker', 'date', 'credibility_score', 'disinfo', 'context', 'subject']
+
+# Colonne mostrate per gli statement simili (anche il testo, letto solo per le righe trovate)
+STATEMENT_COLUMNS = ['statement', 'label', 'speaker', 'date', 'subject', 'context']
+
+DATE_MIN = pd.Timestamp('2007-01-01')
+
+# DASHBOARD_CLIENTSIDE=1: slider di Frequenza e Veridicità gestiti nel browser
+CLIENTSIDE = os.environ.get('DASHBOARD_CLIENTSIDE', '0') == '1'
+
+# La versione del dataset (firma del CSV) identifica lo snapshot dei dati derivati
+registry = DataRegistry(version=dataset_version)
+
+
+def cache_version():
+    return registry.version() + ('-clientside' if CLIENTSIDE else '')
+
+
+# Cache delle figure: DASHBOARD_CACHE_DIR abilita la condivisione su disco fra worker
+figure_cache = FigureCache(
+    max_bytes=int(os.environ.get('DASHBOARD_CACHE_MB', 64)) * 2**20,
+    directory=os.environ.get('DASHBOARD_CACHE_DIR'),
+    version=cache_version,
+)
+registry.subscribe(lambda version: figure_cache.evict_other_versions())
+
+
+def clean(liar_dataset):
+    return liar_dataset.dropna(subset=['date'])
+
+
+@registry.provider('dataset')
+def dataset():
+    return clean(load_dataset(columns=DASHBOARD_COLUMNS))
+
+
+# Dati tab: Frequenza e Percentuale
+@registry.provider('speaker_cube', 'dataset')
+def speaker_cube(liar_dataset):
+    return SpeakerCube(liar_dataset)
+
+
+# Ricerca degli speaker nel menu a tendina, ordinata per numero di statement
+@registry.provider('speaker_index', 'speaker_cube')
+def speaker_index(cube):
+    return SearchIndex(cube.recent_totals)
+
+
+# Patch applicate ai dati già calcolati quando arrivano nuove righe (dashboards.ingest.apply_appended)
+@registry.patch('speaker_cube')
+@registry.patch('speaker_counts')
+@registry.patch('context_counts')
+@registry.patch('subject_counts')
+@registry.patch('daily_series')
+def add_rows(aggregate, batch):
+    return aggregate.add(batch)
+
+
+# Statement di ogni speaker nel tempo: credibilità calcolata dalle label fino a una data o in un intervallo
+@registry.provider('speaker_timeline', 'dataset')
+def speaker_timeline(liar_dataset):
+    return SpeakerTimeline(liar_dataset)
+
+
+# Dati inviati una sola volta al browser in modalità clientside
+@registry.provider('scatter_payload', 'speaker_cube', 'speaker_timeline')
+def scatter_payload(cube, timeline):
+    def rounded(values):
+        return [None if np.isnan(value) else value for value in np.round(values, 4).tolist()]
+
+    payload = {}
+    for year in cube.years:
+        top = cube.year_top(year).sort_values(by='frequenza', ascending=True)
+        payload[year] = {
+            'speaker': top['speaker'].astype(str).tolist(),
+            'frequenza': top['frequenza'].astype(int).tolist(),
+            'credibility_score': rounded(top['credibility_score'].to_numpy(dtype='float64')),
+            'cumulative': rounded(timeline.year_credibility(top['speaker'], year, 'cumulative')),
+            'year': rounded(timeline.year_credibility(top['speaker'], year, 'year')),
+        }
+    return payload
+
+
+@registry.provider('speaker_counts', 'dataset')
+def speaker_counts(liar_dataset):
+    return DisinfoTable(liar_dataset, 'speaker')
+
+
+@registry.provider('speaker_ranking', 'speaker_counts')
+def speaker_ranking(counts):
+    return RatioRanking(counts.counts)
+
+
+# Dati tab: Veridicità
+@registry.provider('daily_series', 'dataset')
+def daily_series(liar_dataset):
+    # Somme delle label e numero di statement per giorno di calendario, con le somme prefisse
+    return CalendarSeries.from_rows(liar_dataset)
+
+
+@registry.provider('date_slider', 'daily_series')
+def date_slider(series):
+    date_min = DATE_MIN
+    date_max = pd.Timestamp(series.dates[-1])
+    date_range = (date_max - date_min).days
+
+    marks = {}
+    current = date_min
+    while current <= date_max:
+        days = (current - date_min).days
+        marks[days] = current.strftime('%Y-%m-%d')
+        current += pd.DateOffset(years=1)
+    marks[0] = date_min.strftime('%Y-%m-%d')
+    marks[date_range] = date_max.strftime('%Y-%m-%d')
+
+    return {'date_min': date_min, 'date_max': date_max, 'date_range': date_range, 'marks': marks}
+
+
+@registry.provider('veridicita_payload', 'daily_series', 'date_slider')
+def veridicita_payload(series, slider):
+    # Conteggi giornalieri sul calendario denso: le medie mobili di ogni finestra si calcolano nel browser
+    date_min = slider['date_min']
+    return {
+        'base': int(date_min.timestamp() * 1000),
+        'offset': int((series.dates[0] - date_min.to_datetime64()) // np.timedelta64(1, 'D')),
+        'label_sum': series.label_sum.astype(int).tolist(),
+        'n_statements': series.n_statements.astype(int).tolist(),
+        'min_periods': {window: min_periods(window) for window in WINDOWS},
+        'max_points': MAX_POINTS,
+    }
+
+
+# Barra dei filtri: anni, totali e prime voci dei menu. Il layout della pagina usa solo questi dati;
+# motore dei filtri e indici di ricerca si calcolano al primo filtro o alla prima ricerca
+@registry.provider('filter_options', 'dataset')
+def filter_options(liar_dataset):
+    years = liar_dataset['date'].dt.year
+    return {
+        'years': (int(years.min()), int(years.max())),
+        'total': len(liar_dataset),
+        # Come la ricerca vuota negli indici: speaker per statement dal MIN_YEAR, temi e contesti per totale
+        'speaker': top_names(liar_dataset.loc[years >= MIN_YEAR, 'speaker'].value_counts()),
+        'subject': top_names(liar_dataset['subject'].value_counts()),
+        'context': top_names(liar_dataset['context'].value_counts()),
+    }
+
+
+# Filtri comuni a tutti i tab: indici per speaker, tema, contesto, anno e label
+@registry.provider('query_engine', 'dataset')
+def query_engine(liar_dataset):
+    return QueryEngine(liar_dataset)
+
+
+@registry.provider('subject_index', 'subject_counts')
+def subject_index(counts):
+    return SearchIndex(counts.counts['total'])
+
+
+@registry.provider('context_index', 'context_counts')
+def context_index(counts):
+    return SearchIndex(counts.counts['total'])
+
+
+# Dati tab: Contesto
+@registry.provider('context_counts', 'dataset')
+def context_counts(liar_dataset):
+    return DisinfoTable(liar_dataset, 'context')
+
+
+@registry.provider('context_ranking', 'context_counts')
+def context_ranking(counts):
+    return RatioRanking(counts.counts)
+
+
+# Dati tab: Tema
+@registry.provider('subject_counts', 'dataset')
+def subject_counts(liar_dataset):
+    return DisinfoTable(liar_dataset, 'subject')
+
+
+@registry.provider('subject_ranking', 'subject_counts')
+def subject_ranking(counts):
+    return RatioRanking(counts.counts)
+
+
+# Dati tab: Statement simili. L'indice si costruisce a parte con `python -m analytics.ann`
+@registry.provider('similar_index')
+def similar_index():
+    # None finché l'indice non è stato costruito o se è di un'altra versione del dataset: gli id sono
+    # posizioni delle righe e indicherebbero altri statement. Come per lo snapshot, se cambia solo
+    # la firma (mtime) decide il digest del contenuto
+    try:
+        index = IVFIndex.load(index_path())
+    except FileNotFoundError:
+        return None
+    if index.meta.get('dataset_version') != dataset_version() and index.meta.get('dataset_digest') != source_digest():
+        return None
+    return index
+
+
+@registry.provider('statement_table')
+def statement_table():
+    # Tutte le righe del dataset, nello stesso ordine degli id dell'indice
+    return load_dataset(columns=STATEMENT_COLUMNS)
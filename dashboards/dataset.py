@@ -0,0 +1,253 @@
+import errno
+import hashlib
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # senza pyarrow si usa solo il CSV
+    pa = None
+    feather = None
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+# LIAR_DATASET_CSV permette di puntare a un altro CSV (es. i dataset sintetici dei benchmark)
+CSV_PATH = os.environ.get('LIAR_DATASET_CSV', os.path.join(DATA_DIR, 'liar_dataset.csv'))
+CACHE_PATH = os.path.splitext(CSV_PATH)[0] + '.arrow'
+
+# Colonne a bassa cardinalità salvate con dictionary encoding
+CATEGORICAL_COLUMNS = ['speaker', 'context', 'subject', 'speaker_description', 'state_info']
+# Testi lunghi: non servono ai grafici e restano nel file mappato finché non vengono richiesti
+TEXT_COLUMNS = ['statement', 'justification']
+
+COMPACT_DTYPES = {
+    'id': 'int32',
+    'label': 'int8',
+    'disinfo': 'int8',
+    'credibility_score': 'float32',
+    'true_counts': 'int32',
+    'mostly_true_counts': 'int32',
+    'half_true_counts': 'int32',
+    'mostly_false_counts': 'int32',
+    'false_counts': 'int32',
+    'pants_on_fire_counts': 'int32',
+}
+
+# Da incrementare quando cambia il formato della cache
+CACHE_FORMAT = 2
+SIGNATURE_KEY = b'source_signature'
+PARENT_KEY = b'parent_signature'
+# Oltre questo numero di segmenti la cache viene ricompattata in un solo file
+MAX_SEGMENTS = 32
+# Byte letti per volta nel calcolo dell'hash del contenuto
+DIGEST_BLOCK = 2**20
+
+
+def source_signature(csv_path=CSV_PATH):
+    stat = os.stat(csv_path)
+    return f'{CACHE_FORMAT}-{stat.st_size}-{stat.st_mtime_ns}'
+
+
+def segments_dir(cache_path=CACHE_PATH):
+    return os.path.splitext(cache_path)[0] + '.segments'
+
+
+def read_csv(csv_path=CSV_PATH):
+    return prepare(pd.read_csv(csv_path))
+
+
+def prepare(df):
+    df = df.copy()
+    df['date'] = pd.to_datetime(df['date'], errors='coerce')
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    return df.astype({col: dtype for col, dtype in COMPACT_DTYPES.items() if col in df.columns})
+
+
+def _arrow_strings(arrow_type):
+    # Le stringhe restano nei buffer Arrow invece di diventare oggetti Python
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return pd.ArrowDtype(arrow_type)
+    return None
+
+
+def _write_table(table, path, signature, parent=None):
+    metadata = dict(table.schema.metadata or {})
+    metadata[SIGNATURE_KEY] = signature
+    if parent is not None:
+        metadata[PARENT_KEY] = parent
+    table = table.replace_schema_metadata(metadata)
+
+    # Scrittura atomica: più worker possono ricostruire la cache in parallelo
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    feather.write_feather(table, tmp_path, compression='uncompressed')
+    os.replace(tmp_path, path)
+
+
+def _read_metadata(path):
+    with pa.memory_map(path) as source:
+        return pa.ipc.open_file(source).schema.metadata or {}
+
+
+def _remove_segments(cache_path):
+    directory = segments_dir(cache_path)
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+def build_cache(csv_path=CSV_PATH, cache_path=CACHE_PATH):
+    df = read_csv(csv_path)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    _write_table(table, cache_path, source_signature(csv_path).encode())
+    _remove_segments(cache_path)
+
+
+def cache_chain(cache_path=CACHE_PATH):
+    # File base più i segmenti aggiunti da append_rows: ogni segmento riporta la firma
+    # del CSV prima e dopo l'aggiunta, e vale solo se prosegue la catena del file base
+    # (un segmento rimasto da prima di una ricostruzione completa viene ignorato)
+    if not os.path.exists(cache_path):
+        return [], None
+    paths = [cache_path]
+    signature = _read_metadata(cache_path).get(SIGNATURE_KEY)
+    directory = segments_dir(cache_path)
+    if os.path.isdir(directory):
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith('.arrow'):
+                continue
+            path = os.path.join(directory, name)
+            metadata = _read_metadata(path)
+            if metadata.get(PARENT_KEY) == signature:
+                paths.append(path)
+                signature = metadata[SIGNATURE_KEY]
+    return paths, signature
+
+
+def cache_is_fresh(csv_path=CSV_PATH, cache_path=CACHE_PATH):
+    paths, signature = cache_chain(cache_path)
+    if not paths:
+        return False
+    if not os.path.exists(csv_path):
+        return True
+    return signature == source_signature(csv_path).encode()
+
+
+def dataset_version(csv_path=CSV_PATH, cache_path=CACHE_PATH):
+    if os.path.exists(csv_path):
+        signature = source_signature(csv_path).encode()
+    else:
+        signature = cache_chain(cache_path)[1]
+    if signature is None:
+        # Né CSV né cache: stesso errore di load_dataset con il percorso atteso
+        raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), csv_path)
+    return _version(signature)
+
+
+def _version(signature):
+    return hashlib.sha1(signature).hexdigest()[:12]
+
+
+def source_digest(csv_path=CSV_PATH, cache_path=CACHE_PATH):
+    # Hash del contenuto del dataset (il CSV, altrimenti i file della cache). A differenza della
+    # versione non cambia quando il file viene copiato su un'altra macchina con un altro mtime
+    paths = [csv_path] if os.path.exists(csv_path) else cache_chain(cache_path)[0]
+    if not paths:
+        raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), csv_path)
+    digest = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(DIGEST_BLOCK), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def appended_rows(version, columns=None, csv_path=CSV_PATH, cache_path=CACHE_PATH):
+    # Righe aggiunte da append_rows dopo la versione indicata, lette dai soli segmenti nuovi, e
+    # versione del dataset che le comprende. None se la versione non è un punto della catena
+    # (CSV ricostruito o modificato a mano, cache non aggiornata o ricompattata): serve un ricalcolo completo
+    if feather is None or not cache_is_fresh(csv_path, cache_path):
+        return None
+    paths, signature = cache_chain(cache_path)
+    for position, path in enumerate(paths[1:], start=1):
+        if _version(_read_metadata(path)[PARENT_KEY]) == version:
+            tables = [feather.read_table(segment, columns=columns, memory_map=True) for segment in paths[position:]]
+            table = pa.concat_tables(tables, promote_options='permissive')
+            return table.to_pandas(types_mapper=_arrow_strings), _version(signature)
+    return None
+
+
+def append_rows(batch, csv_path=CSV_PATH, cache_path=CACHE_PATH):
+    # Aggiunge nuove righe in coda al CSV e, se la cache è aggiornata, un segmento Arrow
+    # con le sole righe nuove: il costo dipende dalla dimensione del batch, non dallo storico
+    with open(csv_path, 'rb') as f:
+        header = f.readline().decode().rstrip('\r\n').split(',')
+        f.seek(-1, os.SEEK_END)
+        newline = f.read(1) != b'\n'
+    missing = [column for column in header if column not in batch.columns]
+    if missing:
+        raise ValueError(f'Colonne mancanti nel batch: {missing}')
+
+    fresh = feather is not None and cache_is_fresh(csv_path, cache_path)
+    parent = source_signature(csv_path).encode()
+    with open(csv_path, 'a', newline='') as f:
+        if newline:
+            f.write('\n')
+        batch[header].to_csv(f, header=False, index=False)
+    if not fresh:
+        return
+
+    directory = segments_dir(cache_path)
+    os.makedirs(directory, exist_ok=True)
+    table = pa.Table.from_pandas(prepare(batch[header]), preserve_index=False)
+    paths, _ = cache_chain(cache_path)
+    path = os.path.join(directory, f'{len(paths):06d}.arrow')
+    _write_table(table, path, source_signature(csv_path).encode(), parent=parent)
+    if len(paths) >= MAX_SEGMENTS:
+        compact_cache(cache_path)
+
+
+def compact_cache(cache_path=CACHE_PATH):
+    # Riscrive file base e segmenti in un solo file, senza rileggere il CSV
+    paths, signature = cache_chain(cache_path)
+    if len(paths) < 2:
+        return
+    tables = [feather.read_table(path, memory_map=True) for path in paths]
+    table = pa.concat_tables(tables, promote_options='permissive').replace_schema_metadata(tables[0].schema.metadata)
+    _write_table(table, cache_path, signature)
+    _remove_segments(cache_path)
+
+
+def load_dataset(columns=None, csv_path=CSV_PATH, cache_path=CACHE_PATH, memory_map=True):
+    if feather is not None:
+        try:
+            if not cache_is_fresh(csv_path, cache_path):
+                build_cache(csv_path, cache_path)
+            # Il file non è compresso: con memory_map le colonne numeriche non vengono copiate
+            # e vengono lette solo le colonne richieste (statement e justification restano su disco)
+            tables = [
+                feather.read_table(path, columns=columns, memory_map=memory_map)
+                for path in cache_chain(cache_path)[0]
+            ]
+            # I segmenti hanno dizionari propri per le colonne categoriche: vengono unificati
+            table = tables[0] if len(tables) == 1 else pa.concat_tables(tables, promote_options='permissive')
+            return table.to_pandas(types_mapper=_arrow_strings)
+        except (OSError, pa.ArrowException):
+            pass
+
+    df = read_csv(csv_path)
+    return df[columns] if columns is not None else df
+
+
+def load_text(columns=TEXT_COLUMNS, csv_path=CSV_PATH, cache_path=CACHE_PATH):
+    return load_dataset(columns=columns, csv_path=csv_path, cache_path=cache_path)
+
+
+if __name__ == '__main__':
+    build_cache()
+    print(f'Cache aggiornata: {os.path.normpath(CACHE_PATH)}')
@@ -0,0 +1,50 @@
+import plotly.express as px
+import plotly.graph_objects as go
+
+
+# Istogrammi top-N: una barra per categoria e tipo, già aggregata
+def disinfo_bar_chart(counts, labels, title):
+    categories = counts.index.astype(str).tolist()
+    fig = go.Figure([
+        go.Bar(x=categories, y=counts[disinfo_text], name=disinfo_text)
+        for disinfo_text in ['disinformation', 'truth']
+    ])
+    fig.update_layout(
+        title=title,
+        barmode='group',
+        legend_title_text=labels['disinfo_text'],
+        xaxis_title=labels['category'],
+        xaxis_tickangle=-45,
+        height=600,
+        yaxis_title='Numero di statement'
+    )
+    return fig
+
+
+def disinfo_heatmap(rows, x_label, title):
+    # rows: categorie già filtrate per supporto e ordinate per proporzione (RatioRanking.top)
+    fig = px.imshow(
+        rows[['disinfo_ratio']].T,
+        text_auto='.2f',
+        labels={'x': x_label, 'y': ''},
+        color_continuous_scale='Reds',
+        zmin=0,
+        zmax=1,
+        aspect='auto',
+        title=title
+    )
+    fig.update_yaxes(showticklabels=False)
+    return fig
+
+
+def empty_figure(title, message):
+    # Nessuna riga da mostrare (ad esempio con i filtri attivi): assi nascosti e un messaggio
+    # al posto di un grafico vuoto o degenere
+    fig = go.Figure()
+    fig.update_layout(
+        title=title,
+        xaxis={'visible': False},
+        yaxis={'visible': False},
+        annotations=[{'text': message, 'xref': 'paper', 'yref': 'paper', 'x': 0.5, 'y': 0.5, 'showarrow': False, 'font': {'size': 16}}],
+    )
+    return fig
@@ -0,0 +1,60 @@
+import argparse
+
+import pandas as pd
+
+from analytics.labels import FAKE_LABELS
+from dashboards.data import DASHBOARD_COLUMNS, clean, registry
+from dashboards.dataset import CACHE_PATH, CSV_PATH, append_rows, appended_rows
+
+COUNT_COLUMNS = [
+    'true_counts', 'mostly_true_counts', 'half_true_counts',
+    'mostly_false_counts', 'false_counts', 'pants_on_fire_counts',
+]
+
+
+def complete(batch):
+    # Colonne derivate calcolate come in data/create_dataset.py se il batch non le contiene
+    batch = batch.copy()
+    if 'credibility_score' not in batch.columns:
+        total = batch[COUNT_COLUMNS].sum(axis=1)
+        batch['credibility_score'] = ((batch['mostly_true_counts'] + batch['true_counts']) / total.where(total > 0)).fillna(0)
+    if 'disinfo' not in batch.columns:
+        batch['disinfo'] = batch['label'].isin(FAKE_LABELS).astype(int)
+    return batch
+
+
+def apply_appended(registry=registry, csv_path=CSV_PATH, cache_path=CACHE_PATH):
+    # Porta lo snapshot del processo alla versione corrente del dataset usando solo le righe
+    # aggiunte dopo la sua versione: i dati con una patch vengono corretti dal batch senza
+    # ricalcolare lo storico. False se le righe nuove non si possono isolare (serve registry.reload)
+    appended = appended_rows(registry.version(), DASHBOARD_COLUMNS, csv_path, cache_path)
+    if appended is None:
+        return False
+    rows, version = appended
+    registry.apply(clean(rows), version=version)
+    return True
+
+
+def ingest(batch, csv_path=CSV_PATH, cache_path=CACHE_PATH, registry=registry):
+    # Aggiunge un batch di nuovi fact-check al dataset salvato. In un processo della dashboard
+    # i dati già calcolati vengono aggiornati subito; gli altri processi (worker gunicorn)
+    # leggono il nuovo segmento dal proprio reloader
+    batch = complete(batch)
+    append_rows(batch, csv_path, cache_path)
+    if registry.loaded():
+        apply_appended(registry, csv_path, cache_path)
+    return len(batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Aggiunge nuovi statement al dataset della dashboard')
+    parser.add_argument('batch', help='CSV con le nuove righe (stesse colonne di liar_dataset.csv)')
+    args = parser.parse_args()
+
+    n_rows = ingest(pd.read_csv(args.batch))
+    print(f'{n_rows} righe aggiunte a {CSV_PATH}')
+    print('Le dashboard in esecuzione le applicano al prossimo controllo (DASHBOARD_RELOAD_SECONDS) o con POST /admin/reload')
+
+
+if __name__ == '__main__':
+    main()
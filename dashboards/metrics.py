@@ -0,0 +1,186 @@
+import functools
+import ipaddress
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from dash.exceptions import PreventUpdate
+from flask import Response, abort, g, has_request_context, request
+
+logger = logging.getLogger(__name__)
+
+# Limiti superiori dei bucket (secondi e byte), come negli istogrammi Prometheus
+LATENCY_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+SIZE_BUCKETS = [1_000, 5_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000, 10_000_000]
+PHASES = ['data', 'figure', 'serialize', 'total']
+
+# DASHBOARD_SLOW_MS: soglia oltre la quale una callback viene registrata nel log con i suoi input
+SLOW_MS = float(os.environ.get('DASHBOARD_SLOW_MS', 0))
+# DASHBOARD_METRICS_PUBLIC=1: /metrics raggiungibile anche da indirizzi non locali
+METRICS_PUBLIC = os.environ.get('DASHBOARD_METRICS_PUBLIC', '0') == '1'
+
+DASH_UPDATE_PATH = '_dash-update-component'
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {self.count}'
+        yield f'{name}_sum{{{labels}}} {self.sum:.6f}'
+        yield f'{name}_count{{{labels}}} {self.count}'
+
+
+class CallbackMetrics:
+    # Latenza per fase, dimensione delle risposte e numero di chiamate per ogni callback
+
+    def __init__(self):
+        self._latency = {}
+        self._size = {}
+        self._calls = {}
+        self._errors = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        # Usato dentro le callback per separare l'accesso ai dati dalla costruzione della figura
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record = getattr(self._local, 'record', None)
+            if record is not None:
+                record[name] = record.get(name, 0.0) + time.perf_counter() - start
+
+    def instrument(self, func):
+        name = func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            record = {'callback': name, 'inputs': args}
+            self._local.record = record
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except PreventUpdate:
+                # Nessun aggiornamento richiesto dalla callback: non è un errore
+                raise
+            except Exception:
+                record['error'] = True
+                raise
+            finally:
+                self._local.record = None
+                record['callback_total'] = time.perf_counter() - start
+                record['figure'] = record['callback_total'] - record.get('data', 0.0)
+                if has_request_context() and request.path.endswith(DASH_UPDATE_PATH):
+                    # Serializzazione e dimensione della risposta si misurano in after_request
+                    g.callback_record = record
+                else:
+                    record['total'] = record['callback_total']
+                    self.record(record)
+
+        return wrapper
+
+    def record(self, record):
+        name = record['callback']
+        with self._lock:
+            for phase in PHASES:
+                if phase in record:
+                    self._latency.setdefault((name, phase), Histogram(LATENCY_BUCKETS)).observe(record[phase])
+            if 'bytes' in record:
+                self._size.setdefault(name, Histogram(SIZE_BUCKETS)).observe(record['bytes'])
+            self._calls[name] = self._calls.get(name, 0) + 1
+            if record.get('error'):
+                self._errors[name] = self._errors.get(name, 0) + 1
+
+        if SLOW_MS and record['total'] * 1000 >= SLOW_MS:
+            logger.warning(
+                'Callback lenta %s: %.1f ms (dati %.1f, figura %.1f, serializzazione %.1f, %s byte) input=%r',
+                name, record['total'] * 1000, record.get('data', 0.0) * 1000, record['figure'] * 1000,
+                record.get('serialize', 0.0) * 1000, record.get('bytes', '-'), record['inputs'],
+            )
+
+    def render(self, figure_cache=None):
+        lines = [
+            '# HELP dashboard_callback_seconds Latenza delle callback per fase',
+            '# TYPE dashboard_callback_seconds histogram',
+        ]
+        with self._lock:
+            for (name, phase), histogram in sorted(self._latency.items()):
+                lines.extend(histogram.lines('dashboard_callback_seconds', f'callback="{name}",phase="{phase}"'))
+            lines += [
+                '# HELP dashboard_callback_response_bytes Dimensione delle risposte delle callback',
+                '# TYPE dashboard_callback_response_bytes histogram',
+            ]
+            for name, histogram in sorted(self._size.items()):
+                lines.extend(histogram.lines('dashboard_callback_response_bytes', f'callback="{name}"'))
+            lines += [
+                '# HELP dashboard_callback_calls_total Chiamate delle callback',
+                '# TYPE dashboard_callback_calls_total counter',
+            ]
+            lines += [f'dashboard_callback_calls_total{{callback="{name}"}} {count}' for name, count in sorted(self._calls.items())]
+            lines += [
+                '# HELP dashboard_callback_errors_total Callback terminate con un\'eccezione',
+                '# TYPE dashboard_callback_errors_total counter',
+            ]
+            lines += [f'dashboard_callback_errors_total{{callback="{name}"}} {count}' for name, count in sorted(self._errors.items())]
+
+        if figure_cache is not None:
+            stats = figure_cache.stats()
+            for key in ('hits', 'disk_hits', 'misses'):
+                lines += [
+                    f'# TYPE dashboard_figure_cache_{key}_total counter',
+                    f'dashboard_figure_cache_{key}_total {stats[key]}',
+                ]
+            for key in ('entries', 'bytes', 'max_bytes'):
+                lines += [
+                    f'# TYPE dashboard_figure_cache_{key} gauge',
+                    f'dashboard_figure_cache_{key} {stats[key]}',
+                ]
+        return '\n'.join(lines) + '\n'
+
+    def register(self, server, figure_cache=None):
+        # Hook Flask: tempo complessivo della richiesta Dash e byte della risposta
+        @server.before_request
+        def start_timer():
+            if request.path.endswith(DASH_UPDATE_PATH):
+                g.request_start = time.perf_counter()
+
+        @server.after_request
+        def record_response(response):
+            record = g.pop('callback_record', None)
+            if record is not None and 'request_start' in g:
+                record['total'] = time.perf_counter() - g.request_start
+                record['serialize'] = max(record['total'] - record['callback_total'], 0.0)
+                record['bytes'] = response.calculate_content_length() or 0
+                self.record(record)
+            return response
+
+        @server.route('/metrics')
+        def metrics():
+            if not METRICS_PUBLIC and not ipaddress.ip_address(request.remote_addr or '127.0.0.1').is_loopback:
+                abort(403)
+            return Response(self.render(figure_cache), mimetype='text/plain; version=0.0.4')
+
+
+callback_metrics = CallbackMetrics()
+phase = callback_metrics.phase
@@ -0,0 +1,199 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from dashboards.aggregates import MIN_YEAR, TOP_SPEAKERS, DisinfoTable
+from dashboards.timeseries import CalendarSeries
+
+DIMENSIONS = ['speaker', 'subject', 'context', 'year', 'label']
+# Dimensioni con pochi valori: una bitmap per valore. Le altre hanno migliaia di valori
+# e una bitmap ciascuno occuperebbe troppa memoria
+BITMAP_DIMENSIONS = ['year', 'label']
+# Memoria per le bitmap dei valori di speaker, subject e context già richiesti: le meno usate escono per prime
+BITMAP_CACHE_BYTES = 64 * 2**20
+
+
+class QueryEngine:
+    # Indici invertiti sulle dimensioni dei filtri. Per year e label ogni valore ha una bitmap
+    # delle righe (parole da 64 bit); per speaker, subject e context le righe di ogni valore sono
+    # una fetta di un unico array ordinato, come in una matrice CSR. Un filtro congiuntivo è
+    # l'AND delle bitmap di ogni dimensione e i conteggi si ottengono con il popcount
+
+    def __init__(self, df):
+        self.n_rows = len(df)
+        self.n_words = (self.n_rows + 63) // 64
+        columns = {
+            'speaker': df['speaker'],
+            'subject': df['subject'],
+            'context': df['context'],
+            'year': df['date'].dt.year,
+            'label': df['label'],
+        }
+        self.values = {}
+        self.codes = {}
+        self._rows = {}
+        self._bitmaps = {}
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._cache_lock = threading.Lock()
+        for dimension, column in columns.items():
+            codes, uniques = pd.factorize(column, sort=True)
+            uniques = pd.Index(np.asarray(uniques))
+            self.values[dimension] = uniques.astype(int) if dimension in BITMAP_DIMENSIONS else uniques.astype(str)
+            self.codes[dimension] = codes.astype('int32')
+            if dimension in BITMAP_DIMENSIONS:
+                masks = self.codes[dimension][None, :] == np.arange(len(uniques), dtype='int32')[:, None]
+                self._bitmaps[dimension] = _pack(masks)
+            else:
+                # Le righe senza valore (codice -1) finiscono prima della prima fetta
+                order = np.argsort(codes, kind='stable').astype('int32')
+                offsets = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+                self._rows[dimension] = (order, offsets)
+
+        disinfo = df['disinfo'].to_numpy() == 1
+        self.disinfo = disinfo
+        self._disinfo_bits = _pack(disinfo)
+        self.credibility = df['credibility_score'].to_numpy(dtype='float64')
+        self.dates = df['date'].to_numpy(dtype='datetime64[ns]')
+        self.labels = df['label'].to_numpy(dtype='int8')
+
+    def __getstate__(self):
+        # Il lock non si può serializzare (snapshot) e le bitmap in cache si ricostruiscono su richiesta
+        state = self.__dict__.copy()
+        for name in ['_cache', '_cache_bytes', '_cache_lock']:
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._cache_lock = threading.Lock()
+
+    def select(self, filters):
+        # Bitmap delle righe che soddisfano tutti i filtri ({dimensione: valori ammessi}), None se non ce ne sono
+        bits = None
+        for dimension, selected in (filters or {}).items():
+            part = self._bitmap(dimension, selected)
+            bits = part if bits is None else bits & part
+        return bits
+
+    def _bitmap(self, dimension, selected):
+        codes = self.values[dimension].get_indexer(list(selected))
+        codes = codes[codes >= 0]
+        if dimension in self._bitmaps:
+            if len(codes) == 0:
+                return np.zeros(self.n_words, dtype='uint64')
+            return np.bitwise_or.reduce(self._bitmaps[dimension][codes], axis=0)
+        bits = np.zeros(self.n_words, dtype='uint64')
+        for code in codes:
+            bits |= self._value_bitmap(dimension, code)
+        return bits
+
+    def _value_bitmap(self, dimension, code):
+        # Bitmap delle righe di un valore, costruita dalla sua fetta di righe alla prima richiesta
+        key = (dimension, int(code))
+        with self._cache_lock:
+            bits = self._cache.get(key)
+            if bits is not None:
+                self._cache.move_to_end(key)
+                return bits
+        order, offsets = self._rows[dimension]
+        rows = order[offsets[code]:offsets[code + 1]]
+        bits = np.zeros(self.n_words, dtype='uint64')
+        np.bitwise_or.at(bits, rows >> 6, np.left_shift(np.uint64(1), (rows & 63).astype('uint64')))
+        with self._cache_lock:
+            if key not in self._cache:
+                self._cache[key] = bits
+                self._cache_bytes += bits.nbytes
+            while self._cache_bytes > BITMAP_CACHE_BYTES and len(self._cache) > 1:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= evicted.nbytes
+        return bits
+
+    def rows(self, filters):
+        bits = self.select(filters)
+        if bits is None:
+            return None
+        return np.flatnonzero(np.unpackbits(bits.view('uint8'), count=self.n_rows, bitorder='little'))
+
+    def count(self, filters):
+        # Numero di statement e di statement di disinformazione: solo popcount, nessuna riga letta
+        bits = self.select(filters)
+        if bits is None:
+            return self.n_rows, int(_popcount(self._disinfo_bits))
+        return int(_popcount(bits)), int(_popcount(bits & self._disinfo_bits))
+
+    def group(self, dimension, filters, credibility=False):
+        # Conteggi disinformazione/verità per valore di dimension sulle righe filtrate
+        values = self.values[dimension]
+        bits = self.select(filters)
+        if dimension in self._bitmaps and not credibility:
+            bitmaps = self._bitmaps[dimension] if bits is None else self._bitmaps[dimension] & bits
+            total = _popcount(bitmaps)
+            disinformation = _popcount(bitmaps & self._disinfo_bits)
+            counts = pd.DataFrame({'disinformation': disinformation, 'truth': total - disinformation}, index=values)
+        else:
+            rows = self.rows(filters)
+            codes = self.codes[dimension] if rows is None else self.codes[dimension][rows]
+            disinfo = self.disinfo if rows is None else self.disinfo[rows]
+            valid = codes >= 0
+            codes, disinfo = codes[valid], disinfo[valid]
+            total = np.bincount(codes, minlength=len(values))
+            disinformation = np.bincount(codes, weights=disinfo, minlength=len(values)).astype('int64')
+            counts = pd.DataFrame({'disinformation': disinformation, 'truth': total - disinformation}, index=values)
+            if credibility:
+                scores = self.credibility if rows is None else self.credibility[rows]
+                score_sum = np.bincount(codes, weights=scores[valid], minlength=len(values))
+                counts['credibility_score'] = score_sum / np.where(total > 0, total, 1)
+        counts.index.name = dimension
+        counts['total'] = counts['disinformation'] + counts['truth']
+        return counts[counts['total'] > 0]
+
+    def table(self, dimension, filters):
+        # Stessa interfaccia dei DisinfoTable precalcolati (top, order, counts)
+        return DisinfoTable.from_counts(self.group(dimension, filters), dimension)
+
+    def year_top(self, year, filters):
+        # Come SpeakerCube.year_top: primi speaker dell'anno per numero di statement
+        counts = self.group('speaker', dict(filters or {}, year=[year]), credibility=True)
+        top = counts.sort_index().sort_values('total', ascending=False, kind='stable').head(TOP_SPEAKERS)
+        return pd.DataFrame({
+            'speaker': top.index.astype(str),
+            'frequenza': top['total'].to_numpy(),
+            'credibility_score': top['credibility_score'].to_numpy(dtype='float32'),
+        })
+
+    def speaker_years(self, speaker, filters):
+        # Come SpeakerCube.speaker_years, con le sole righe che soddisfano i filtri
+        counts = self.group('year', dict(filters or {}, speaker=[speaker]))
+        counts = counts[counts.index >= MIN_YEAR]
+        return pd.DataFrame({
+            'year': counts.index.astype(int),
+            'total_statements': counts['total'].to_numpy(),
+            'fake_statements': counts['disinformation'].to_numpy(),
+        })
+
+    def daily(self, filters):
+        rows = self.rows(filters)
+        if rows is None:
+            rows = slice(None)
+        frame = pd.DataFrame({'date': self.dates[rows], 'label': self.labels[rows]})
+        return CalendarSeries.from_rows(frame)
+
+
+def _pack(masks):
+    # Maschere booleane -> bitmap in parole da 64 bit sull'ultimo asse (bit i = riga i)
+    n_rows = masks.shape[-1]
+    padded = np.zeros(masks.shape[:-1] + (((n_rows + 63) // 64) * 64,), dtype=bool)
+    padded[..., :n_rows] = masks
+    return np.packbits(padded, axis=-1, bitorder='little').view('uint64')
+
+
+def _popcount(bits):
+    # Bit a 1 per bitmap (ultimo asse)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(bits).sum(axis=-1, dtype='int64')
+    return np.unpackbits(bits.view('uint8'), axis=-1).sum(axis=-1, dtype='int64')
@@ -0,0 +1,157 @@
+import functools
+import threading
+
+
+class Snapshot:
+    # Valori calcolati per una versione del dataset
+
+    def __init__(self, version, values=None):
+        self.version = version
+        self.values = values if values is not None else {}
+        self.lock = threading.RLock()
+
+
+class DataRegistry:
+    # Dati derivati dichiarati per nome insieme alle loro dipendenze: ognuno viene
+    # calcolato al primo utilizzo e poi condiviso da tutti i tab montati nel processo.
+    # I valori vivono in uno snapshot per versione del dataset: reload e apply ne
+    # costruiscono uno nuovo e lo sostituiscono in un solo passo
+
+    def __init__(self, providers=None, patches=None, version=None):
+        self.providers = providers if providers is not None else {}
+        self.patches = patches if patches is not None else {}
+        self.version_func = version
+        self.listeners = []
+        self._snapshot = None
+        self._local = threading.local()
+        self._lock = threading.RLock()
+
+    def provider(self, name, *requires):
+        def decorator(func):
+            self.providers[name] = (func, requires)
+            return func
+        return decorator
+
+    def patch(self, name):
+        # Aggiornamento incrementale di un dato già calcolato: func(valore, batch) -> nuovo valore
+        def decorator(func):
+            self.patches[name] = func
+            return func
+        return decorator
+
+    def subscribe(self, func):
+        # func(versione) viene chiamata dopo ogni cambio di snapshot
+        self.listeners.append(func)
+        return func
+
+    def current(self):
+        # Lo snapshot fissato dalla callback in corso, altrimenti l'ultimo pubblicato
+        snapshot = getattr(self._local, 'snapshot', None)
+        return snapshot if snapshot is not None else self._latest()
+
+    def _latest(self):
+        if self._snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot = Snapshot(self.source_version())
+        return self._snapshot
+
+    def version(self):
+        return self.current().version
+
+    def get(self, name):
+        return self._get(self.current(), name)
+
+    def _get(self, snapshot, name):
+        try:
+            return snapshot.values[name]
+        except KeyError:
+            pass
+        with snapshot.lock:
+            if name not in snapshot.values:
+                func, requires = self.providers[name]
+                snapshot.values[name] = func(*[self._get(snapshot, dependency) for dependency in requires])
+            return snapshot.values[name]
+
+    def pinned(self, func):
+        # Una callback usa lo stesso snapshot dall'inizio alla fine, anche se nel
+        # frattempo ne viene pubblicato uno nuovo; quello vecchio viene liberato
+        # quando l'ultima callback che lo usa termina
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if getattr(self._local, 'snapshot', None) is not None:
+                return func(*args, **kwargs)
+            self._local.snapshot = self._latest()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._local.snapshot = None
+
+        return wrapper
+
+    def warm(self, names=None):
+        for name in names or list(self.providers):
+            self.get(name)
+
+    def loaded(self):
+        return list(self.current().values)
+
+    def dependents(self, name):
+        # Tutti i dati che dipendono, anche indirettamente, da name
+        found = []
+        for other, (_, requires) in self.providers.items():
+            if name in requires and other not in found:
+                found.append(other)
+                found += [item for item in self.dependents(other) if item not in found]
+        return found
+
+    def reload(self, force=False):
+        # Ricalcola in questo thread tutti i dati già presenti nello snapshot corrente
+        # per la nuova versione del dataset, poi li pubblica insieme
+        with self._lock:
+            old = self._latest()
+            version = self.source_version()
+            if version == old.version and not force:
+                return False
+            snapshot = Snapshot(version)
+            for name in list(old.values):
+                self._get(snapshot, name)
+            self._publish(snapshot)
+            return True
+
+    def apply(self, batch, source='dataset', version=None):
+        # Nuove righe arrivate in source: i dati con una patch vengono aggiornati dal batch,
+        # gli altri che dipendono da source vengono ricalcolati in questo thread, come in reload,
+        # così lo snapshot pubblicato ha gli stessi dati di quello vecchio e nessuna richiesta
+        # deve calcolarli. version è la versione del dataset che comprende il batch (default: quella corrente)
+        with self._lock:
+            old = self._latest()
+            values = dict(old.values)
+            values.pop(source, None)
+            for name in self.dependents(source):
+                value = values.pop(name, None)
+                _, requires = self.providers[name]
+                if value is not None and name in self.patches and source in requires:
+                    values[name] = self.patches[name](value, batch)
+            snapshot = Snapshot(version or self.source_version(), values)
+            for name in list(old.values):
+                self._get(snapshot, name)
+            self._publish(snapshot)
+
+    def restore(self, version, values):
+        # Valori salvati in precedenza (dashboards.snapshot): validi solo per la versione corrente
+        with self._lock:
+            if version != self.source_version():
+                return False
+            # I nomi senza più un provider non si potrebbero ricalcolare al prossimo reload
+            self._publish(Snapshot(version, {name: value for name, value in values.items() if name in self.providers}))
+            return True
+
+    def _publish(self, snapshot):
+        # Sostituzione in un solo passo: chi legge vede lo snapshot vecchio o quello nuovo
+        self._snapshot = snapshot
+        for listener in self.listeners:
+            listener(snapshot.version)
+
+    def source_version(self):
+        return self.version_func() if self.version_func is not None else ''
@@ -0,0 +1,153 @@
+import ipaddress
+import logging
+import os
+import threading
+import time
+
+from flask import abort, jsonify, request
+
+from dashboards.data import registry
+from dashboards.dataset import CSV_PATH
+from dashboards.ingest import apply_appended
+
+logger = logging.getLogger(__name__)
+
+# DASHBOARD_RELOAD_SECONDS: ogni quanti secondi controllare se il CSV è cambiato (0 = solo su richiesta)
+RELOAD_SECONDS = float(os.environ.get('DASHBOARD_RELOAD_SECONDS', 0))
+# DASHBOARD_ADMIN_TOKEN: abilita /admin/reload anche da indirizzi non locali con l'header X-Admin-Token
+ADMIN_TOKEN = os.environ.get('DASHBOARD_ADMIN_TOKEN')
+# DASHBOARD_RELOAD_STAMP: file scritto da /admin/reload e controllato da tutti i processi della dashboard,
+# così con gunicorn la richiesta arriva a ogni worker e non solo a quello che l'ha ricevuta
+RELOAD_STAMP = os.environ.get('DASHBOARD_RELOAD_STAMP', os.path.splitext(CSV_PATH)[0] + '.reload')
+# DASHBOARD_RELOAD_POLL_SECONDS: ogni quanti secondi controllare il file (0 = mai)
+STAMP_SECONDS = float(os.environ.get('DASHBOARD_RELOAD_POLL_SECONDS', 2))
+
+
+def read_stamp(path):
+    try:
+        with open(path) as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+class Reloader:
+    # Thread in background che ricostruisce lo snapshot dei dati quando cambia la versione
+    # del dataset: le richieste continuano a usare quello vecchio fino alla sostituzione
+
+    def __init__(self, registry, interval=RELOAD_SECONDS, stamp_path=RELOAD_STAMP, stamp_interval=STAMP_SECONDS):
+        self.registry = registry
+        self.interval = interval
+        self.stamp_path = stamp_path
+        self.stamp_interval = stamp_interval
+        # Letto all'import: con --preload i worker ereditano il valore del master e vedono
+        # anche le richieste arrivate prima che il loro thread partisse
+        self._stamp = read_stamp(stamp_path)
+        self.reloads = 0
+        self.patches = 0
+        self._pending = None
+        self._pid = None
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+
+    def start(self):
+        # Un thread per processo: con gunicorn --preload i thread del master non passano ai worker
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._wake = threading.Event()
+            # Richiesta arrivata prima della partenza del thread: si applica subito
+            if self.stamp_interval > 0 and self._stamped():
+                self._wake.set()
+        threading.Thread(target=self._run, name='dataset-reload', daemon=True).start()
+
+    def trigger(self):
+        self.start()
+        self._wake.set()
+
+    def broadcast(self):
+        # Nuovo valore nel file condiviso: gli altri processi aggiornano i dati al prossimo controllo
+        stamp = f'{time.time_ns()}-{os.getpid()}'
+        tmp_path = f'{self.stamp_path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                f.write(stamp)
+            os.replace(tmp_path, self.stamp_path)
+        except OSError:
+            logger.exception('Impossibile scrivere %s: aggiornato solo questo processo', self.stamp_path)
+            return
+        self._stamp = stamp
+
+    def _stamped(self):
+        stamp = read_stamp(self.stamp_path)
+        if stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        return stamp is not None
+
+    def reload(self):
+        with self._reload_lock:
+            old = self.registry.version()
+            # Righe aggiunte con dashboards.ingest: si aggiornano solo i dati toccati dal batch
+            if apply_appended(self.registry):
+                self.patches += 1
+                logger.info('Nuove righe applicate: versione %s -> %s', old, self.registry.version())
+                return True
+            if self.registry.reload():
+                self.reloads += 1
+                logger.info('Dataset aggiornato: versione %s -> %s', old, self.registry.version())
+                return True
+            return False
+
+    def _run(self):
+        # Il file condiviso si controlla ogni stamp_interval, il CSV ogni interval
+        polls = [seconds for seconds in (self.interval, self.stamp_interval) if seconds > 0]
+        checked = time.monotonic()
+        while True:
+            triggered = self._wake.wait(min(polls) if polls else None)
+            self._wake.clear()
+            try:
+                if triggered or (self.stamp_interval > 0 and self._stamped()):
+                    self.reload()
+                elif self.interval > 0 and time.monotonic() - checked >= self.interval:
+                    checked = time.monotonic()
+                    if self._settled():
+                        self.reload()
+            except Exception:
+                # Lo snapshot corrente resta valido: si riprova al prossimo controllo
+                logger.exception('Aggiornamento del dataset non riuscito')
+
+    def _settled(self):
+        # Il CSV potrebbe essere ancora in scrittura: si ricarica solo quando la nuova
+        # versione resta uguale per due controlli consecutivi
+        version = self.registry.source_version()
+        if version == self.registry.version():
+            self._pending = None
+            return False
+        settled = version == self._pending
+        self._pending = version
+        return settled
+
+    def register(self, server):
+        @server.before_request
+        def start_watcher():
+            self.start()
+
+        @server.route('/admin/reload', methods=['POST'])
+        def admin_reload():
+            token = request.headers.get('X-Admin-Token')
+            local = ipaddress.ip_address(request.remote_addr or '127.0.0.1').is_loopback
+            if not local and not (ADMIN_TOKEN and token == ADMIN_TOKEN):
+                abort(403)
+            self.broadcast()
+            # ?wait=1 attende la fine della ricostruzione in questo processo (utile negli script di deploy)
+            if request.args.get('wait') == '1':
+                reloaded = self.reload()
+                return jsonify(version=self.registry.version(), reloaded=reloaded)
+            self.trigger()
+            return jsonify(version=self.registry.version(), reloaded=None), 202
+
+
+reloader = Reloader(registry)
@@ -0,0 +1,82 @@
+import json
+import os
+import pickle
+import struct
+import time
+
+import plotly.graph_objects as go
+
+from dashboards.data import registry
+from dashboards.dataset import CSV_PATH, source_digest
+
+# DASHBOARD_SNAPSHOT: file con tutti i dati derivati, calcolato una volta con `python -m dashboards.snapshot`
+SNAPSHOT_PATH = os.environ.get('DASHBOARD_SNAPSHOT', os.path.splitext(CSV_PATH)[0] + '.snapshot')
+
+# Da incrementare quando cambiano gli aggregati o il formato del file
+SNAPSHOT_FORMAT = 7
+MAGIC = b'LIARSNAP'
+# Il dataset completo serve solo a calcolare gli aggregati e si rilegge dalla cache Arrow se necessario;
+# l'indice degli statement simili e i testi sono già file in memory-map
+SKIP = ['dataset', 'similar_index', 'statement_table']
+
+
+def save(path=SNAPSHOT_PATH):
+    registry.warm()
+    snapshot = registry.current()
+    values = {}
+    for name, value in snapshot.values.items():
+        if name in SKIP:
+            continue
+        # Le figure diventano JSON Plotly: al caricamento non vengono ricostruite e validate
+        if isinstance(value, go.Figure):
+            value = json.loads(value.to_json())
+        values[name] = value
+
+    header = json.dumps({
+        'format': SNAPSHOT_FORMAT,
+        'version': snapshot.version,
+        'digest': source_digest(),
+        'names': sorted(values),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }).encode()
+    # Array NumPy e frame pandas vengono serializzati come buffer contigui (protocollo 5)
+    payload = pickle.dumps(values, protocol=5)
+
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        f.write(payload)
+    os.replace(tmp_path, path)
+    return snapshot.version
+
+
+def read_header(f):
+    if f.read(len(MAGIC)) != MAGIC:
+        return None
+    (size,) = struct.unpack('<I', f.read(4))
+    return json.loads(f.read(size))
+
+
+def load(path=SNAPSHOT_PATH):
+    # Usa lo snapshot solo se è stato calcolato dallo stesso CSV; altrimenti i dati vengono
+    # calcolati come di consueto. La versione (size e mtime) è il controllo rapido: se è diversa,
+    # ad esempio per un CSV copiato su una nuova istanza, si confronta l'hash del contenuto
+    try:
+        with open(path, 'rb') as f:
+            header = read_header(f)
+            if header is None or header['format'] != SNAPSHOT_FORMAT:
+                return False
+            version = registry.source_version()
+            if header['version'] != version and header.get('digest') != source_digest():
+                return False
+            values = pickle.load(f)
+    except OSError:
+        return False
+    return registry.restore(version, values)
+
+
+if __name__ == '__main__':
+    version = save()
+    print(f'Snapshot {version} scritto in {os.path.normpath(SNAPSHOT_PATH)}')
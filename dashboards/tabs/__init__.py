@@ -0,0 +1,73 @@
+import dash
+import dash_bootstrap_components as dbc
+from dash import html
+from dash.dependencies import Input, Output
+
+from dashboards.data import CLIENTSIDE, figure_cache, registry
+from dashboards.metrics import callback_metrics, phase
+from dashboards.reload import reloader
+from dashboards.snapshot import load as load_snapshot
+from dashboards.tabs import context, filters, line, scatter, similar, subject, veridicita
+
+TABS = {tab.tab_id: tab for tab in [scatter.TAB, line.TAB, veridicita.TAB, context.TAB, subject.TAB, similar.TAB]}
+
+
+@figure_cache.memoize
+def render_tab_content(active_tab):
+    tab = TABS.get(active_tab)
+    if tab is None:
+        return html.Div('Tab non trovata.')
+    with phase('data'):
+        registry.warm(tab.requires)
+    return tab.layout()
+
+
+def warm(tab_ids):
+    registry.warm(filters.REQUIRES + filters.QUERY_REQUIRES)
+    for tab_id in tab_ids:
+        registry.warm(TABS[tab_id].requires)
+
+
+def create_app(tab_ids, title, name=__name__):
+    tabs = [TABS[tab_id] for tab_id in tab_ids]
+    # Dati derivati già calcolati da `python -m dashboards.snapshot`, se corrispondono al CSV
+    load_snapshot()
+
+    app = dash.Dash(name, external_stylesheets=[dbc.themes.BOOTSTRAP], suppress_callback_exceptions=True)
+
+    # Layout calcolato a ogni caricamento della pagina: la barra dei filtri mostra gli anni
+    # e i valori più frequenti della versione corrente del dataset
+    def page_layout():
+        return dbc.Container(
+            [
+                html.H1(title, className='my-4'),
+                filters.layout(),
+                dbc.Tabs(
+                    [dbc.Tab(label=tab.label, tab_id=tab.tab_id) for tab in tabs],
+                    id='tabs',
+                    active_tab=tabs[0].tab_id,
+                ),
+                html.Div(id='tab-content', className='p-4'),
+            ],
+            fluid=True
+        )
+
+    app.layout = page_layout
+
+    app.callback(
+        Output('tab-content', 'children'),
+        Input('tabs', 'active_tab')
+    )(callback_metrics.instrument(registry.pinned(render_tab_content)))
+    for outputs, inputs, callback in filters.CALLBACKS:
+        app.callback(outputs, inputs)(callback_metrics.instrument(registry.pinned(callback)))
+    for tab in tabs:
+        if CLIENTSIDE and tab.clientside_callbacks:
+            for function, outputs, inputs in tab.clientside_callbacks:
+                app.clientside_callback(function, outputs, inputs)
+        else:
+            for outputs, inputs, callback in tab.callbacks:
+                app.callback(outputs, inputs)(callback_metrics.instrument(registry.pinned(callback)))
+    callback_metrics.register(app.server, figure_cache)
+    reloader.register(app.server)
+
+    return app
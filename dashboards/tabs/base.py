@@ -0,0 +1,11 @@
+class Tab:
+    # Un tab della dashboard: layout, callback e dati del registro da cui dipende
+
+    def __init__(self, tab_id, label, requires, layout, callbacks, clientside_callbacks=None):
+        self.tab_id = tab_id
+        self.label = label
+        self.requires = requires
+        self.layout = layout
+        self.callbacks = callbacks
+        # (funzione JavaScript, output, input): sostituiscono le callback server in modalità clientside
+        self.clientside_callbacks = clientside_callbacks or []
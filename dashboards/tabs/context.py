@@ -0,0 +1,63 @@
+from dash import dcc, html
+from dash.dependencies import Input, Output
+
+from dashboards.data import figure_cache, registry
+from dashboards.figures import disinfo_bar_chart
+from dashboards.metrics import phase
+from dashboards.tabs import heatmaps
+from dashboards.tabs.base import Tab
+from dashboards.tabs.filters import disinfo_table
+
+
+def layout():
+    return html.Div([
+        html.H4('Analisi della Disinformazione per Contesto', style={'textAlign': 'center'}),
+        html.Label('Numero di contesti da mostrare:'),
+        dcc.Input(
+            id='num-contexts',
+            type='number',
+            min=1,
+            max=len(registry.get('context_counts').order),
+            value=10,
+            step=1,
+            style={'marginBottom': '20px'}
+        ),
+        dcc.Graph(id='context-histogram'),
+        heatmaps.controls('context', 'Contesti')
+    ])
+
+
+@figure_cache.memoize
+def update_context_histogram(num_contexts, filters=None):
+    with phase('data'):
+        counts = disinfo_table('context', 'context_counts', filters).top(num_contexts)
+    return disinfo_bar_chart(
+        counts,
+        labels={'disinfo_text': 'Tipo', 'category': 'Contesto'},
+        title=f'Conteggio per contesto: disinformazione vs verità (top {num_contexts})'
+    )
+
+
+@figure_cache.memoize
+def update_context_heatmap(min_support, size, page, filters=None):
+    with phase('data'):
+        ranking = heatmaps.ranking('context', 'context_ranking', 'context_counts', filters)
+    return heatmaps.heatmap_page(
+        ranking, min_support, size, page, 'Contesto', 'Proporzione di disinformazione per contesto'
+    )
+
+
+TAB = Tab(
+    tab_id='context',
+    label='Contesto',
+    requires=['context_counts', 'context_ranking'],
+    layout=layout,
+    callbacks=[
+        (
+            Output('context-histogram', 'figure'),
+            [Input('num-contexts', 'value'), Input('filters', 'data')],
+            update_context_histogram,
+        ),
+        (heatmaps.outputs('context'), heatmaps.inputs('context'), update_context_heatmap),
+    ],
+)
@@ -0,0 +1,147 @@
+import dash_bootstrap_components as dbc
+from dash import dcc, html
+from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
+
+from dashboards.data import registry
+from dashboards.metrics import phase
+
+LABEL_NAMES = {0: 'Pants on fire', 1: 'Falso', 2: 'Quasi falso', 3: 'Mezzo vero', 4: 'Quasi vero', 5: 'Vero'}
+# Menu a tendina con ricerca lato server: id del componente -> (dimensione, indice nel registro, testo iniziale)
+SEARCH_DROPDOWNS = {
+    'filter-speaker': ('speaker', 'speaker_index', 'Speaker...'),
+    'filter-subject': ('subject', 'subject_index', 'Temi...'),
+    'filter-context': ('context', 'context_index', 'Contesti...'),
+}
+# Il layout usa solo filter_options: motore e indici si calcolano al primo filtro o alla prima ricerca
+REQUIRES = ['filter_options']
+QUERY_REQUIRES = ['query_engine'] + [index for _, index, _ in SEARCH_DROPDOWNS.values()]
+
+
+def search_options(names, selected):
+    # Le voci selezionate restano fra le opzioni, altrimenti il menu le mostrerebbe vuote
+    if isinstance(selected, str):
+        selected = [selected]
+    names = [name for name in selected or [] if name not in names] + list(names)
+    return [{'label': name, 'value': name} for name in names]
+
+
+def layout():
+    # Barra dei filtri comune a tutti i tab: ogni grafico usa le sole righe selezionate
+    options = registry.get('filter_options')
+    first_year, last_year = options['years']
+    dropdowns = [
+        dbc.Col(dcc.Dropdown(
+            id=component_id,
+            options=search_options(options[dimension], None),
+            multi=True,
+            placeholder=placeholder,
+        ), md=4)
+        for component_id, (dimension, _, placeholder) in SEARCH_DROPDOWNS.items()
+    ]
+    return html.Div([
+        dbc.Row(dropdowns, className='mb-2'),
+        dbc.Row([
+            dbc.Col(dcc.RangeSlider(
+                id='filter-year',
+                min=first_year,
+                max=last_year,
+                value=[first_year, last_year],
+                marks={str(year): str(year) for year in range(first_year, last_year + 1, 2)},
+                step=1,
+                allowCross=False,
+            ), md=6),
+            dbc.Col(dcc.Checklist(
+                id='filter-label',
+                options=[{'label': name, 'value': label} for label, name in LABEL_NAMES.items()],
+                value=list(LABEL_NAMES),
+                inline=True,
+                inputStyle={'marginRight': '4px', 'marginLeft': '10px'},
+            ), md=6),
+        ]),
+        html.Div(id='filter-summary', className='text-muted mt-2'),
+        dcc.Store(id='filters', data={}),
+    ], className='border rounded p-3 mb-3')
+
+
+def search_filter(index, search_value, selected):
+    # Quando il testo viene cancellato (es. dopo una selezione) le opzioni restano invariate
+    if not search_value:
+        raise PreventUpdate
+    with phase('data'):
+        names = registry.get(index).search(search_value)
+    return search_options(names, selected)
+
+
+def search_speaker_filter(search_value, selected):
+    return search_filter('speaker_index', search_value, selected)
+
+
+def search_subject_filter(search_value, selected):
+    return search_filter('subject_index', search_value, selected)
+
+
+def search_context_filter(search_value, selected):
+    return search_filter('context_index', search_value, selected)
+
+
+def update_filters(speakers, subjects, contexts, year_range, labels):
+    # Solo i filtri attivi: senza filtri i grafici usano gli aggregati precalcolati
+    filters = {}
+    for dimension, selected in (('speaker', speakers), ('subject', subjects), ('context', contexts)):
+        if selected:
+            filters[dimension] = sorted(selected)
+    first_year, last_year = registry.get('filter_options')['years']
+    if year_range and (year_range[0] > first_year or year_range[1] < last_year):
+        filters['year'] = list(range(int(year_range[0]), int(year_range[1]) + 1))
+    if labels is not None and len(labels) < len(LABEL_NAMES):
+        filters['label'] = sorted(labels)
+    return filters
+
+
+def update_summary(filters):
+    if not filters:
+        return f"{registry.get('filter_options')['total']} statement, nessun filtro attivo"
+    with phase('data'):
+        total, disinformation = registry.get('query_engine').count(filters)
+    ratio = disinformation / total if total else 0
+    return f'{total} statement selezionati, {ratio:.1%} di disinformazione'
+
+
+def disinfo_table(dimension, precomputed, filters):
+    # Senza filtri l'aggregato precalcolato, altrimenti i conteggi dal motore dei filtri
+    if not filters:
+        return registry.get(precomputed)
+    return registry.get('query_engine').table(dimension, filters)
+
+
+CALLBACKS = [
+    (
+        Output('filter-speaker', 'options'),
+        [Input('filter-speaker', 'search_value'), State('filter-speaker', 'value')],
+        search_speaker_filter,
+    ),
+    (
+        Output('filter-subject', 'options'),
+        [Input('filter-subject', 'search_value'), State('filter-subject', 'value')],
+        search_subject_filter,
+    ),
+    (
+        Output('filter-context', 'options'),
+        [Input('filter-context', 'search_value'), State('filter-context', 'value')],
+        search_context_filter,
+    ),
+    (
+        Output('filters', 'data'),
+        [
+            Input('filter-speaker', 'value'),
+            Input('filter-subject', 'value'),
+            Input('filter-context', 'value'),
+            Input('filter-year', 'value'),
+            Input('filter-label', 'value'),
+        ],
+        update_filters,
+    ),
+    (Output('filter-summary', 'children'), Input('filters', 'data'), update_summary),
+]
+
@@ -0,0 +1,75 @@
+import dash_bootstrap_components as dbc
+from dash import dcc, html
+from dash.dependencies import Input, Output
+
+from dashboards.aggregates import RatioRanking
+from dashboards.data import registry
+from dashboards.figures import disinfo_heatmap
+from dashboards.tabs.filters import disinfo_table
+
+# Valori iniziali: stessa soglia delle heatmap originali, una pagina leggibile di celle
+MIN_SUPPORT = 50
+PAGE_SIZE = 30
+MAX_PAGE_SIZE = 200
+
+
+def controls(prefix, label):
+    # Soglia di supporto, categorie per pagina e pagina corrente della heatmap di un tab
+    return html.Div([
+        dbc.Row([
+            dbc.Col([
+                html.Label('Supporto minimo (statement):'),
+                dcc.Input(id=f'{prefix}-min-support', type='number', min=1, value=MIN_SUPPORT, step=1, debounce=True),
+            ], md=3),
+            dbc.Col([
+                html.Label(f'{label} per pagina:'),
+                dcc.Input(
+                    id=f'{prefix}-heatmap-size', type='number', min=1, max=MAX_PAGE_SIZE, value=PAGE_SIZE, step=1,
+                    debounce=True,
+                ),
+            ], md=3),
+            dbc.Col(
+                dbc.Pagination(
+                    id=f'{prefix}-heatmap-page', active_page=1, max_value=1,
+                    fully_expanded=False, previous_next=True, first_last=True,
+                ),
+                md=6,
+            ),
+        ], className='align-items-end'),
+        dcc.Graph(id=f'{prefix}-heatmap'),
+    ])
+
+
+def outputs(prefix):
+    return [Output(f'{prefix}-heatmap', 'figure'), Output(f'{prefix}-heatmap-page', 'max_value')]
+
+
+def inputs(prefix):
+    return [
+        Input(f'{prefix}-min-support', 'value'),
+        Input(f'{prefix}-heatmap-size', 'value'),
+        Input(f'{prefix}-heatmap-page', 'active_page'),
+        Input('filters', 'data'),
+    ]
+
+
+def ranking(dimension, precomputed, counts, filters):
+    # Senza filtri l'ordinamento precalcolato, altrimenti quello dei conteggi filtrati
+    if not filters:
+        return registry.get(precomputed)
+    return RatioRanking(disinfo_table(dimension, counts, filters).counts)
+
+
+def heatmap_page(ranking, min_support, size, page, x_label, title):
+    # Gli input vuoti (campo cancellato) tornano ai valori iniziali; la pagina resta nell'intervallo valido
+    min_support = max(int(min_support or MIN_SUPPORT), 1)
+    size = min(max(int(size or PAGE_SIZE), 1), MAX_PAGE_SIZE)
+    n_categories = ranking.count(min_support)
+    pages = max(-(-n_categories // size), 1)
+    offset = (min(max(int(page or 1), 1), pages) - 1) * size
+    rows = ranking.top(min_support, size, offset)
+    if len(rows):
+        title = f'{title} ({offset + 1}-{offset + len(rows)} di {n_categories}, supporto >= {min_support})'
+    else:
+        title = f'{title} (nessuna categoria con supporto >= {min_support})'
+    return disinfo_heatmap(rows, x_label, title), pages
@@ -0,0 +1,138 @@
+import numpy as np
+import plotly.express as px
+from dash import dcc, html
+from dash.dependencies import Input, Output, State
+
+from dashboards.data import figure_cache, registry
+from dashboards.figures import disinfo_bar_chart, empty_figure
+from dashboards.metrics import phase
+from dashboards.tabs import heatmaps
+from dashboards.tabs.base import Tab
+from dashboards.tabs.filters import disinfo_table, search_filter, search_options
+
+
+def layout():
+    speaker_cube = registry.get('speaker_cube')
+    selected = speaker_cube.most_frequent_speaker  # default: speaker più frequente
+    return html.Div([
+        html.Label('Seleziona uno speaker:'),
+        # Al browser arrivano solo i primi speaker: gli altri si cercano digitando il nome
+        dcc.Dropdown(
+            id='speaker-dropdown',
+            options=search_options(registry.get('speaker_index').search(''), selected),
+            value=selected,
+            placeholder='Cerca uno speaker...',
+            clearable=False,
+            style={'width': '50%'}
+        ),
+        dcc.Graph(id='speaker-fake-news-graph'),
+        html.Hr(),
+        html.Label('Numero di speaker da mostrare:'),
+        dcc.Input(
+            id='num-speakers',
+            type='number',
+            min=1,
+            max=len(registry.get('speaker_counts').order),
+            value=10,
+            step=1,
+            style={'marginBottom': '20px'}
+        ),
+        dcc.Graph(id='speaker-histogram'),
+        heatmaps.controls('speaker', 'Speaker')
+    ])
+
+
+def search_speakers(search_value, selected):
+    return search_filter('speaker_index', search_value, selected)
+
+
+@figure_cache.memoize
+def update_speaker_graph(selected_speaker, filters=None):
+    with phase('data'):
+        if filters:
+            df_plot = registry.get('query_engine').speaker_years(selected_speaker, filters)
+        else:
+            df_plot = registry.get('speaker_cube').speaker_years(selected_speaker)
+        df_plot['percent_fake'] = (df_plot['fake_statements'] / df_plot['total_statements']) * 100
+        # Credibilità a fine anno dalle label di tutti gli statement dello speaker fino a quella data
+        year_ends = np.array([f'{year}-12-31' for year in df_plot['year']], dtype='datetime64[D]')
+        credibility = registry.get('speaker_timeline').credibility([selected_speaker] * len(df_plot), None, year_ends)
+
+    title = f'Percentuale di fake news per anno - {selected_speaker}'
+    if df_plot.empty:
+        return empty_figure(title, 'Nessuno statement dello speaker con i filtri selezionati')
+    fig = px.line(
+        df_plot,
+        x='year',
+        y='percent_fake',
+        title=title,
+        labels={
+            'year': 'Anno',
+            'percent_fake': '% Notizie False',
+            'total_statements': 'Numero Statement'
+        },
+        markers=True,
+        hover_data={
+            'year': True,
+            'percent_fake': ':.2f',
+            'total_statements': True
+        }
+    )
+    fig.update_traces(name='% Notizie False', showlegend=True)
+    fig.add_scatter(
+        x=df_plot['year'],
+        y=credibility * 100,
+        mode='lines+markers',
+        name='% Credibilità a fine anno',
+        line=dict(dash='dot'),
+        hovertemplate='Anno=%{x}<br>% Credibilità=%{y:.2f}<extra></extra>',
+    )
+    fig.update_layout(yaxis_range=[-10, 110])
+
+    return fig
+
+
+@figure_cache.memoize
+def update_histogram(num_speakers, filters=None):
+    with phase('data'):
+        counts = disinfo_table('speaker', 'speaker_counts', filters).top(num_speakers)
+    return disinfo_bar_chart(
+        counts,
+        labels={'disinfo_text': 'Disinformazione', 'category': 'Speaker'},
+        title=f'Conteggio per speaker: disinformazione vs verità/parzialità (top {num_speakers})'
+    )
+
+
+@figure_cache.memoize
+def update_speaker_heatmap(min_support, size, page, filters=None):
+    with phase('data'):
+        ranking = heatmaps.ranking('speaker', 'speaker_ranking', 'speaker_counts', filters)
+    return heatmaps.heatmap_page(
+        ranking, min_support, size, page, 'Speaker', 'Proporzione di disinformazione per speaker'
+    )
+
+
+TAB = Tab(
+    tab_id='line',
+    label='Percentuale',
+    requires=['speaker_cube', 'speaker_timeline', 'speaker_index', 'speaker_counts', 'speaker_ranking'],
+    layout=layout,
+    callbacks=[
+        (
+            Output('speaker-dropdown', 'options'),
+            [Input('speaker-dropdown', 'search_value'), State('speaker-dropdown', 'value')],
+            search_speakers,
+        ),
+        (
+            Output('speaker-fake-news-graph', 'figure'),
+            [Input('speaker-dropdown', 'value'), Input('filters', 'data')],
+            update_speaker_graph,
+        ),
+        (
+            Output('speaker-histogram', 'figure'),
+            [Input('num-speakers', 'value'), Input('filters', 'data')],
+            update_histogram,
+        ),
+        (heatmaps.outputs('speaker'), heatmaps.inputs('speaker'), update_speaker_heatmap),
+    ],
+)
@@ -0,0 +1,131 @@
+import plotly.express as px
+from dash import dcc, html
+from dash.dependencies import Input, Output, State
+
+from dashboards.data import CLIENTSIDE, figure_cache, registry
+from dashboards.figures import empty_figure
+from dashboards.metrics import phase
+from dashboards.tabs.base import Tab
+
+# Credibilità sull'asse y: quella fornita da LIAR2 (conteggi storici dello speaker) oppure
+# calcolata dalle label dei suoi statement nel dataset, fino alla fine dell'anno o solo nell'anno
+CREDIBILITY_MODES = {
+    'liar2': 'Credibility Score',
+    'cumulative': "Credibilità fino all'anno",
+    'year': "Credibilità nell'anno",
+}
+
+# Stessa figura di update_figure, costruita nel browser dai dati per anno in scatter-payload
+UPDATE_FIGURE_JS = """
+function(selectedYear, credibility, payload) {
+    var rows = payload[selectedYear] || {speaker: [], frequenza: [], credibility_score: [], cumulative: [], year: []};
+    var y = credibility === 'liar2' ? rows.credibility_score : rows[credibility];
+    var titles = {liar2: 'Credibility Score', cumulative: "Credibilità fino all'anno", year: "Credibilità nell'anno"};
+    var maxSize = Math.max.apply(null, rows.frequenza.concat([1]));
+    return {
+        data: [{
+            type: 'scatter',
+            mode: 'markers',
+            x: rows.frequenza,
+            y: y,
+            hovertext: rows.speaker,
+            hovertemplate: '<b>%{hovertext}</b><br><br>Frequenza=%{x}<br>' + titles[credibility] + '=%{y}<extra></extra>',
+            marker: {size: rows.frequenza, sizemode: 'area', sizeref: 2 * maxSize / (50 * 50)}
+        }],
+        layout: {
+            title: {text: 'Frequenza delle dichiarazioni per i primi 30 speaker (' + selectedYear + ')'},
+            height: 700,
+            xaxis: {title: {text: 'Frequenza'}},
+            yaxis: {title: {text: titles[credibility]}, tickfont: {size: 10}},
+            legend: {itemsizing: 'constant'}
+        }
+    };
+}
+"""
+
+
+def layout():
+    speaker_cube = registry.get('speaker_cube')
+    children = [
+        dcc.Graph(id='graph-with-slider'),
+        dcc.Slider(
+            id='year-slider',
+            min=speaker_cube.years[0],
+            max=speaker_cube.years[-1],
+            value=speaker_cube.years[0],
+            marks={str(year): str(year) for year in speaker_cube.years},
+            step=None
+        ),
+        dcc.RadioItems(
+            id='credibility-mode',
+            options=[{'label': label, 'value': mode} for mode, label in CREDIBILITY_MODES.items()],
+            value='liar2',
+            inline=True,
+            inputStyle={'marginRight': '4px', 'marginLeft': '10px'},
+            style={'marginTop': '20px'},
+        ),
+    ]
+    if CLIENTSIDE:
+        children.append(dcc.Store(id='scatter-payload', data=registry.get('scatter_payload')))
+    return html.Div(children)
+
+
+@figure_cache.memoize
+def update_figure(selected_year, filters=None, credibility='liar2'):
+    with phase('data'):
+        if filters:
+            speaker_counts = registry.get('query_engine').year_top(selected_year, filters)
+        else:
+            speaker_counts = registry.get('speaker_cube').year_top(selected_year)
+        speaker_counts = speaker_counts.sort_values(by='frequenza', ascending=True)
+        if credibility != 'liar2':
+            # Dalla storia completa dello speaker, anche con i filtri attivi
+            timeline = registry.get('speaker_timeline')
+            speaker_counts = speaker_counts.assign(
+                credibility_score=timeline.year_credibility(speaker_counts['speaker'], selected_year, credibility)
+            )
+
+    title = f'Frequenza delle dichiarazioni per i primi 30 speaker ({selected_year})'
+    if speaker_counts.empty:
+        return empty_figure(title, "Nessuno statement nell'anno selezionato con i filtri attivi")
+    fig = px.scatter(
+        speaker_counts,
+        x='frequenza',
+        y='credibility_score',
+        title=title,
+        labels={'frequenza': 'Frequenza', 'speaker': 'Speaker', 'credibility_score': CREDIBILITY_MODES[credibility]},
+        height=700,
+        size='frequenza',
+        size_max=50,
+        hover_name='speaker',
+    )
+
+    fig.update_layout(
+        yaxis=dict(tickfont=dict(size=10)),
+        coloraxis_showscale=False
+    )
+
+    return fig
+
+
+TAB = Tab(
+    tab_id='scatter',
+    label='Frequenza',
+    requires=['speaker_cube', 'speaker_timeline'] + (['scatter_payload'] if CLIENTSIDE else []),
+    layout=layout,
+    callbacks=[
+        (
+            Output('graph-with-slider', 'figure'),
+            [Input('year-slider', 'value'), Input('filters', 'data'), Input('credibility-mode', 'value')],
+            update_figure,
+        ),
+    ],
+    # I dati nel browser sono quelli precalcolati: in modalità clientside la barra dei filtri non si applica
+    clientside_callbacks=[
+        (
+            UPDATE_FIGURE_JS,
+            Output('graph-with-slider', 'figure'),
+            [Input('year-slider', 'value'), Input('credibility-mode', 'value'), State('scatter-payload', 'data')],
+        ),
+    ],
+)
@@ -0,0 +1,108 @@
+import threading
+
+import dash_bootstrap_components as dbc
+import pandas as pd
+from dash import dcc, html
+from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
+
+from analytics.embeddings import sbert_encoder
+from dashboards.data import registry
+from dashboards.metrics import phase
+from dashboards.tabs.base import Tab
+from dashboards.tabs.filters import LABEL_NAMES
+
+DEFAULT_K = 10
+MAX_K = 50
+# Con i filtri attivi si cercano più candidati, poi si tengono i primi k che li soddisfano
+FILTER_CANDIDATES = 20
+
+# Un encoder per modello, caricato alla prima ricerca. Il lock evita che callback concorrenti
+# creino due volte lo stesso encoder
+ENCODERS = {}
+ENCODERS_LOCK = threading.Lock()
+
+
+def encoder(model_name):
+    with ENCODERS_LOCK:
+        if model_name not in ENCODERS:
+            ENCODERS[model_name] = sbert_encoder(model_name)
+        return ENCODERS[model_name]
+
+
+def layout():
+    if registry.get('similar_index') is None:
+        return dbc.Alert(
+            "Indice non disponibile o costruito su un'altra versione del dataset: eseguire `python -m analytics.ann` "
+            "per calcolare gli embedding e costruire l'indice.",
+            color='warning',
+        )
+    return html.Div([
+        html.H4('Statement simili', style={'textAlign': 'center'}),
+        html.Label("Scrivi un'affermazione:"),
+        dcc.Textarea(id='similar-query', style={'width': '100%', 'height': 80}),
+        html.Label('Numero di risultati:', style={'marginRight': '10px'}),
+        dcc.Input(id='similar-k', type='number', min=1, max=MAX_K, value=DEFAULT_K, step=1),
+        dbc.Button('Cerca', id='similar-search', color='primary', className='ms-3'),
+        html.Div(id='similar-results', className='mt-3'),
+    ])
+
+
+def matches(rows, filters):
+    # Stessi filtri della barra comune, applicati alle sole righe trovate
+    mask = pd.Series(True, index=rows.index)
+    for dimension, selected in filters.items():
+        if dimension == 'year':
+            values = rows['date'].dt.year
+        elif dimension == 'label':
+            values = rows['label']
+        else:
+            values = rows[dimension].astype(str)
+        mask &= values.isin(selected)
+    return mask
+
+
+def update_similar(n_clicks, query, k, filters=None):
+    index = registry.get('similar_index')
+    if index is None or not query or not query.strip():
+        raise PreventUpdate
+    k = min(int(k or DEFAULT_K), MAX_K)
+    with phase('data'):
+        try:
+            vector = encoder(index.meta['model'])([query])[0]
+        except ImportError:
+            return dbc.Alert('Per cercare serve il pacchetto sentence-transformers.', color='warning')
+        ids, scores = index.search(vector, k * FILTER_CANDIDATES if filters else k)
+        rows = registry.get('statement_table').iloc[ids].assign(similarity=scores)
+        if filters:
+            rows = rows[matches(rows, filters)].head(k)
+    if rows.empty:
+        return html.Div('Nessuno statement trovato con i filtri selezionati.')
+    table = pd.DataFrame({
+        'Similarità': rows['similarity'].map('{:.3f}'.format),
+        'Label': rows['label'].map(LABEL_NAMES),
+        'Speaker': rows['speaker'].astype(str),
+        'Data': rows['date'].dt.strftime('%Y-%m-%d'),
+        'Statement': rows['statement'].astype(str),
+    })
+    return dbc.Table.from_dataframe(table, striped=True, hover=True, size='sm')
+
+
+TAB = Tab(
+    tab_id='similar',
+    label='Statement simili',
+    requires=['similar_index', 'statement_table'],
+    layout=layout,
+    callbacks=[
+        (
+            Output('similar-results', 'children'),
+            [
+                Input('similar-search', 'n_clicks'),
+                State('similar-query', 'value'),
+                State('similar-k', 'value'),
+                Input('filters', 'data'),
+            ],
+            update_similar,
+        ),
+    ],
+)
@@ -0,0 +1,63 @@
+from dash import dcc, html
+from dash.dependencies import Input, Output
+
+from dashboards.data import figure_cache, registry
+from dashboards.figures import disinfo_bar_chart
+from dashboards.metrics import phase
+from dashboards.tabs import heatmaps
+from dashboards.tabs.base import Tab
+from dashboards.tabs.filters import disinfo_table
+
+
+def layout():
+    return html.Div([
+        html.H4('Analisi della Disinformazione per Tema', style={'textAlign': 'center'}),
+        html.Label('Numero di temi da mostrare:'),
+        dcc.Input(
+            id='num-subjects',
+            type='number',
+            min=1,
+            max=len(registry.get('subject_counts').order),
+            value=10,
+            step=1,
+            style={'marginBottom': '20px'}
+        ),
+        dcc.Graph(id='subject-histogram'),
+        heatmaps.controls('subject', 'Temi')
+    ])
+
+
+@figure_cache.memoize
+def update_subject_histogram(num_subjects, filters=None):
+    with phase('data'):
+        counts = disinfo_table('subject', 'subject_counts', filters).top(num_subjects)
+    return disinfo_bar_chart(
+        counts,
+        labels={'disinfo_text': 'Disinformazione', 'category': 'Tema'},
+        title=f'Conteggio per tema: disinformazione vs verità/parzialità (top {num_subjects})'
+    )
+
+
+@figure_cache.memoize
+def update_subject_heatmap(min_support, size, page, filters=None):
+    with phase('data'):
+        ranking = heatmaps.ranking('subject', 'subject_ranking', 'subject_counts', filters)
+    return heatmaps.heatmap_page(
+        ranking, min_support, size, page, 'Tema', 'Proporzione di disinformazione per tema'
+    )
+
+
+TAB = Tab(
+    tab_id='subject',
+    label='Tema',
+    requires=['subject_counts', 'subject_ranking'],
+    layout=layout,
+    callbacks=[
+        (
+            Output('subject-histogram', 'figure'),
+            [Input('num-subjects', 'value'), Input('filters', 'data')],
+            update_subject_histogram,
+        ),
+        (heatmaps.outputs('subject'), heatmaps.inputs('subject'), update_subject_heatmap),
+    ],
+)
@@ -0,0 +1,208 @@
+import pandas as pd
+import plotly.graph_objects as go
+from dash import dcc, html
+from dash.dependencies import Input, Output, State
+
+from dashboards.data import CLIENTSIDE, figure_cache, registry
+from dashboards.metrics import phase
+from dashboards.tabs.base import Tab
+from dashboards.timeseries import WINDOWS, downsample
+
+# Finestra della media mobile e peso di ogni statement nella media
+WEIGHTINGS = {
+    'statement': 'Ogni affermazione pesa uguale',
+    'day': 'Ogni giorno pesa uguale',
+}
+
+# Stessa figura di update_veridicita_graph: somme prefisse sui conteggi giornalieri e LTTB nel browser
+UPDATE_VERIDICITA_JS = """
+function(sliderRange, window, weighting, payload) {
+    var n = payload.n_statements.length;
+    var prefix = {labelSum: [0], count: [0], dailyMean: [0], observed: [0]};
+    for (var i = 0; i < n; i++) {
+        var c = payload.n_statements[i], s = payload.label_sum[i];
+        prefix.labelSum.push(prefix.labelSum[i] + s);
+        prefix.count.push(prefix.count[i] + c);
+        prefix.dailyMean.push(prefix.dailyMean[i] + (c > 0 ? s / c : 0));
+        prefix.observed.push(prefix.observed[i] + (c > 0 ? 1 : 0));
+    }
+
+    function toDate(day) {
+        return new Date(payload.base + day * 86400000).toISOString().slice(0, 10);
+    }
+
+    function lttb(x, y, threshold) {
+        var n = x.length;
+        if (threshold >= n || threshold < 3) { return x.map(function (_, i) { return i; }); }
+        var keep = [0], previous = 0, every = (n - 2) / (threshold - 2);
+        for (var i = 0; i < threshold - 2; i++) {
+            var start = Math.floor(i * every) + 1, end = Math.floor((i + 1) * every) + 1;
+            var nextEnd = Math.min(Math.floor((i + 2) * every) + 1, n);
+            var avgX = 0, avgY = 0;
+            for (var j = end; j < nextEnd; j++) { avgX += x[j]; avgY += y[j]; }
+            avgX /= (nextEnd - end); avgY /= (nextEnd - end);
+            var best = start, bestArea = -1;
+            for (var k = start; k < end; k++) {
+                var area = Math.abs((x[previous] - avgX) * (y[k] - y[previous]) - (x[previous] - x[k]) * (avgY - y[previous]));
+                if (area > bestArea) { bestArea = area; best = k; }
+            }
+            keep.push(best);
+            previous = best;
+        }
+        keep.push(n - 1);
+        return keep;
+    }
+
+    // Posizioni nel calendario dei giorni selezionati con lo slider
+    var start = Math.max(sliderRange[0] - payload.offset, 0), end = Math.min(sliderRange[1] - payload.offset + 1, n);
+    var minPeriods = payload.min_periods[window];
+    var days = [], means = [], counts = [];
+    for (var hi = start + 1; hi <= end; hi++) {
+        var lo = Math.max(hi - window, 0);
+        var observed = prefix.observed[hi] - prefix.observed[lo];
+        if (observed < minPeriods) { continue; }
+        var count = prefix.count[hi] - prefix.count[lo];
+        days.push(hi - 1 + payload.offset);
+        means.push(weighting === 'day'
+            ? (prefix.dailyMean[hi] - prefix.dailyMean[lo]) / observed
+            : (prefix.labelSum[hi] - prefix.labelSum[lo]) / count);
+        counts.push(count / (hi - lo));
+    }
+
+    function trace(y) {
+        var keep = lttb(days, y, payload.max_points);
+        return {x: keep.map(function (i) { return toDate(days[i]); }), y: keep.map(function (i) { return y[i]; })};
+    }
+
+    var mean = trace(means), count = trace(counts);
+    var figure = {
+        data: [
+            {type: 'scatter', mode: 'lines', name: 'Media Veridicità', x: mean.x, y: mean.y, line: {color: 'royalblue'}},
+            {type: 'scatter', mode: 'lines', name: 'N. medio affermazioni', x: count.x, y: count.y, line: {color: 'orange'}, yaxis: 'y2'}
+        ],
+        layout: {
+            title: {text: 'Veridicità media e frequenza affermazioni nel tempo (media mobile ' + window + ' giorni)'},
+            xaxis: {title: {text: 'Data'}},
+            yaxis: {title: {text: 'Media Veridicità', font: {color: 'royalblue'}}, tickfont: {color: 'royalblue'}},
+            yaxis2: {title: {text: 'N. medio affermazioni', font: {color: 'orange'}}, tickfont: {color: 'orange'}, overlaying: 'y', side: 'right'}
+        }
+    };
+    var rangeText = 'Intervallo selezionato: ' + toDate(sliderRange[0]) + ' → ' + toDate(sliderRange[1]);
+    return [figure, rangeText];
+}
+"""
+
+
+def layout():
+    slider = registry.get('date_slider')
+    payload = [dcc.Store(id='veridicita-payload', data=registry.get('veridicita_payload'))] if CLIENTSIDE else []
+    return html.Div(payload + [
+        html.H4('Analisi della Veridicità', style={'textAlign': 'center'}),
+        dcc.Graph(id='veridicita-graph'),
+        html.Br(),
+        dcc.RangeSlider(
+            id='date-slider',
+            min=0,
+            max=slider['date_range'],
+            value=[0, slider['date_range']],
+            marks=slider['marks'],
+            allowCross=False,
+            tooltip={'placement': 'bottom', 'always_visible': False},
+            step=1
+        ),
+        html.Div(id='selected-date-range', style={'textAlign': 'center', 'marginTop': 10}),
+        html.Label('Media mobile su:'),
+        dcc.RadioItems(
+            id='veridicita-window',
+            options=[{'label': f'{window} giorni', 'value': window} for window in WINDOWS],
+            value=30,
+            inline=True,
+            inputStyle={'marginRight': '4px', 'marginLeft': '10px'},
+        ),
+        dcc.RadioItems(
+            id='veridicita-weighting',
+            options=[{'label': label, 'value': weighting} for weighting, label in WEIGHTINGS.items()],
+            value='statement',
+            inline=True,
+            inputStyle={'marginRight': '4px', 'marginLeft': '10px'},
+        ),
+    ])
+
+
+@figure_cache.memoize
+def update_veridicita_graph(slider_range, filters=None, window=30, weighting='statement'):
+    with phase('data'):
+        series = registry.get('query_engine').daily(filters) if filters else registry.get('daily_series')
+        date_min = registry.get('date_slider')['date_min']
+        start_date = date_min + pd.Timedelta(days=slider_range[0])
+        end_date = date_min + pd.Timedelta(days=slider_range[1])
+        # Ogni punto è la differenza di due somme prefisse: cambiare finestra costa come spostare lo slider
+        dates, mean, count = series.rolling(window, weighting, start_date, end_date)
+        mean_dates, mean_values = downsample(dates, mean)
+        count_dates, count_values = downsample(dates, count)
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=mean_dates,
+        y=mean_values,
+        mode='lines',
+        name='Media Veridicità',
+        line=dict(color='royalblue')
+    ))
+    fig.add_trace(go.Scatter(
+        x=count_dates,
+        y=count_values,
+        mode='lines',
+        name='N. medio affermazioni',
+        line=dict(color='orange'),
+        yaxis='y2'
+    ))
+    fig.update_layout(
+        title=f'Veridicità media e frequenza affermazioni nel tempo (media mobile {window} giorni)',
+        xaxis_title='Data',
+        yaxis=dict(
+            title=dict(text='Media Veridicità', font=dict(color='royalblue')),
+            tickfont=dict(color='royalblue')
+        ),
+        yaxis2=dict(
+            title=dict(text='N. medio affermazioni', font=dict(color='orange')),
+            tickfont=dict(color='orange'),
+            overlaying='y',
+            side='right'
+        ),
+        template='plotly'
+    )
+    range_text = f"Intervallo selezionato: {start_date.strftime('%Y-%m-%d')} → {end_date.strftime('%Y-%m-%d')}"
+    return fig, range_text
+
+
+TAB = Tab(
+    tab_id='veridicita',
+    label='Veridicità',
+    requires=['daily_series', 'date_slider'] + (['veridicita_payload'] if CLIENTSIDE else []),
+    layout=layout,
+    callbacks=[
+        (
+            [Output('veridicita-graph', 'figure'), Output('selected-date-range', 'children')],
+            [
+                Input('date-slider', 'value'),
+                Input('filters', 'data'),
+                Input('veridicita-window', 'value'),
+                Input('veridicita-weighting', 'value'),
+            ],
+            update_veridicita_graph,
+        ),
+    ],
+    # I dati nel browser sono quelli precalcolati: in modalità clientside la barra dei filtri non si applica
+    clientside_callbacks=[
+        (
+            UPDATE_VERIDICITA_JS,
+            [Output('veridicita-graph', 'figure'), Output('selected-date-range', 'children')],
+            [
+                Input('date-slider', 'value'),
+                Input('veridicita-window', 'value'),
+                Input('veridicita-weighting', 'value'),
+                State('veridicita-payload', 'data'),
+            ],
+        ),
+    ],
+)
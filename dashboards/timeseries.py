@@ -0,0 +1,193 @@
+import numpy as np
+import pandas as pd
+
+from dashboards.aggregates import CREDIBLE_LABELS, LABELS
+
+# Punti massimi per traccia inviati al browser
+MAX_POINTS = 500
+# Finestre della media mobile selezionabili nel tab Veridicità (giorni di calendario)
+WINDOWS = [7, 30, 90, 365]
+# Chiave (speaker, giorno) in un solo int64: codice dello speaker nei bit alti, giorno nei 32 bassi
+DAY_BITS = 32
+DAY_BIAS = 2**31
+
+
+class CalendarSeries:
+    # Somma delle label e numero di statement per ogni giorno di calendario (anche quelli senza
+    # statement) con le rispettive somme prefisse: la media mobile su una finestra qualsiasi di
+    # giorni di calendario è la differenza fra due elementi, per ogni punto
+
+    def __init__(self, start, label_sum, n_statements):
+        self.dates = np.datetime64(start, 'D') + np.arange(len(n_statements))
+        self.label_sum = label_sum
+        self.n_statements = n_statements
+        daily_mean = np.divide(label_sum, n_statements, out=np.zeros(len(label_sum)), where=n_statements > 0)
+        self._prefix = {
+            'label_sum': _prefix(label_sum),
+            'n_statements': _prefix(n_statements),
+            'daily_mean': _prefix(daily_mean),
+            'observed': _prefix(n_statements > 0),
+        }
+
+    @classmethod
+    def from_rows(cls, df):
+        totals = daily_totals(df)
+        days = totals['date'].to_numpy(dtype='datetime64[D]')
+        if len(days) == 0:
+            return cls(np.datetime64('today', 'D'), np.zeros(0), np.zeros(0))
+        start = days.min()
+        size = int((days.max() - start).astype('int64')) + 1
+        label_sum = np.zeros(size)
+        n_statements = np.zeros(size)
+        positions = (days - start).astype('int64')
+        np.add.at(label_sum, positions, totals['label_sum'].to_numpy())
+        np.add.at(n_statements, positions, totals['n_statements'].to_numpy())
+        return cls(start, label_sum, n_statements)
+
+    def add(self, df):
+        # Nuova serie con le righe del batch; il calendario si allunga se arrivano date esterne
+        batch = CalendarSeries.from_rows(df)
+        if len(batch.dates) == 0:
+            return self
+        if len(self.dates) == 0:
+            return batch
+        start = min(self.dates[0], batch.dates[0])
+        size = int((max(self.dates[-1], batch.dates[-1]) - start).astype('int64')) + 1
+        label_sum = np.zeros(size)
+        n_statements = np.zeros(size)
+        for series in (self, batch):
+            offset = int((series.dates[0] - start).astype('int64'))
+            label_sum[offset:offset + len(series.dates)] += series.label_sum
+            n_statements[offset:offset + len(series.dates)] += series.n_statements
+        return CalendarSeries(start, label_sum, n_statements)
+
+    def bounds(self, start, end):
+        start_idx = np.searchsorted(self.dates, np.datetime64(start, 'D'), side='left')
+        end_idx = np.searchsorted(self.dates, np.datetime64(end, 'D'), side='right')
+        return start_idx, end_idx
+
+    def rolling(self, window, weighting, start, end):
+        # Media delle label e statement medi al giorno nelle finestre di `window` giorni che
+        # terminano in ogni giorno di [start, end]. weighting 'statement': ogni statement pesa
+        # uguale; 'day': media delle medie giornaliere, come la versione originale
+        start_idx, end_idx = self.bounds(start, end)
+        hi = np.arange(start_idx, end_idx) + 1
+        lo = np.maximum(hi - window, 0)
+
+        def total(name):
+            return self._prefix[name][hi] - self._prefix[name][lo]
+
+        observed = total('observed')
+        if weighting == 'day':
+            numerator, denominator = total('daily_mean'), observed
+        else:
+            numerator, denominator = total('label_sum'), total('n_statements')
+        # Come min_periods=10 su 30 giorni: servono abbastanza giorni con statement nella finestra
+        enough = observed >= min_periods(window)
+        mean = np.divide(numerator, denominator, out=np.full(len(hi), np.nan), where=enough & (denominator > 0))
+        count = np.where(enough, total('n_statements') / (hi - lo), np.nan)
+        return self.dates[start_idx:end_idx], mean, count
+
+
+def min_periods(window):
+    return max(window // 3, 1)
+
+
+def downsample(dates, values, max_points=MAX_POINTS):
+    valid = np.isfinite(values)
+    dates, values = dates[valid], values[valid]
+    keep = lttb(dates.astype('datetime64[ns]').astype('int64').astype('float64'), values, max_points)
+    return dates[keep], values[keep]
+
+
+def _prefix(values):
+    prefix = np.zeros(len(values) + 1)
+    np.cumsum(values, out=prefix[1:])
+    return prefix
+
+
+class SpeakerTimeline:
+    # Statement di tutti gli speaker ordinati per (speaker, data) con i conteggi cumulati di ogni
+    # label: i conteggi di uno speaker in un intervallo [a, b] sono la differenza fra due righe
+    # trovate con ricerca binaria, anche per molti speaker o intervalli alla volta
+
+    def __init__(self, df):
+        codes, speakers = pd.factorize(df['speaker'], sort=True)
+        days = df['date'].to_numpy(dtype='datetime64[D]').astype('int64')
+        order = np.lexsort((days, codes))
+        order = order[codes[order] >= 0]
+        self.speakers = pd.Index(np.asarray(speakers)).astype(str)
+        self._keys = _day_keys(codes[order], days[order])
+        labels = df['label'].to_numpy()[order]
+        cumulative = np.zeros((len(order) + 1, len(LABELS)), dtype='int32')
+        np.cumsum(labels[:, None] == np.array(LABELS), axis=0, out=cumulative[1:])
+        self._cumulative = cumulative
+
+    def counts(self, speakers, start=None, end=None):
+        # Conteggi per label (una riga per speaker) degli statement con data in [start, end];
+        # start ed end possono essere date singole o array lunghi quanto speakers
+        codes = self.speakers.get_indexer(list(speakers))
+        lo = np.searchsorted(self._keys, _day_keys(codes, _days(start, -DAY_BIAS, len(codes))), side='left')
+        hi = np.searchsorted(self._keys, _day_keys(codes, _days(end, DAY_BIAS - 1, len(codes))), side='right')
+        counts = self._cumulative[hi] - self._cumulative[lo]
+        # Speaker sconosciuti: codice -1, nessuno statement
+        counts[codes < 0] = 0
+        return counts
+
+    def credibility(self, speakers, start=None, end=None):
+        # Quota di statement mostly-true/true, come credibility_score ma dalle label osservate
+        counts = self.counts(speakers, start, end)
+        total = counts.sum(axis=1)
+        credible = counts[:, CREDIBLE_LABELS].sum(axis=1)
+        return np.divide(credible, total, out=np.full(len(total), np.nan), where=total > 0)
+
+    def year_credibility(self, speakers, year, mode):
+        # mode 'cumulative': tutti gli statement fino alla fine dell'anno; 'year': solo quelli dell'anno
+        start = np.datetime64(f'{year}-01-01') if mode == 'year' else None
+        return self.credibility(speakers, start, np.datetime64(f'{year}-12-31'))
+
+
+def _days(dates, default, size):
+    if dates is None:
+        return np.full(size, default, dtype='int64')
+    days = np.asarray(dates, dtype='datetime64[D]').astype('int64')
+    return np.broadcast_to(days, (size,))
+
+
+def _day_keys(codes, days):
+    return (np.asarray(codes, dtype='int64') << DAY_BITS) + (days + DAY_BIAS)
+
+
+def daily_totals(df):
+    totals = df.groupby('date').agg(label_sum=('label', 'sum'), n_statements=('label', 'size')).reset_index()
+    return totals.astype({'label_sum': 'float64', 'n_statements': 'float64'})
+
+
+def lttb(x, y, threshold):
+    # Largest-Triangle-Three-Buckets: restituisce gli indici dei punti da mantenere
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = n - 1
+
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        bucket_x = x[start:end]
+        bucket_y = y[start:end]
+        area = np.abs(
+            (x[previous] - avg_x) * (bucket_y - y[previous])
+            - (x[previous] - bucket_x) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        keep[i + 1] = previous
+
+    return keep
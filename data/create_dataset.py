@@ -1,47 +1,131 @@
-from datasets import load_dataset
-import pandas as pd
-
-dataset = load_dataset("chengxuphd/liar2")
-
-train = dataset["train"]
-validation = dataset["validation"]
-test = dataset["test"]
-
-def calculate_total_statements(row):
-    row["total_statements"] = (
-        row['true_counts'] +
-        row['mostly_true_counts'] +
-        row['half_true_counts'] +
-        row['mostly_false_counts'] +
-        row['false_counts'] +
-        row['pants_on_fire_counts']
+import argparse
+import os
+
+import numpy as np
+
+COUNT_COLUMNS = [
+    'true_counts',
+    'mostly_true_counts',
+    'half_true_counts',
+    'mostly_false_counts',
+    'false_counts',
+    'pants_on_fire_counts',
+]
+# Label di disinformazione: pants-fire, false, mostly-false
+FAKE_LABELS = [0, 1, 2]
+# Colonne lette dal calcolo: statement e justification non vengono caricati
+INPUT_COLUMNS = COUNT_COLUMNS + ['label']
+# Stesse colonne, nello stesso ordine, di data/liar_dataset.csv: dashboards.ingest aggiunge righe solo con questo header
+CSV_COLUMNS = [
+    'id', 'label', 'statement', 'date', 'subject', 'speaker', 'speaker_description', *COUNT_COLUMNS,
+    'context', 'justification', 'credibility_score', 'disinfo',
+]
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'liar_parquet')
+
+
+def calculate_total_statements(*columns):
+    # Versione vettoriale: riceve un batch come array NumPy, una colonna di INPUT_COLUMNS per argomento
+    batch = dict(zip(INPUT_COLUMNS, columns))
+    total_statements = np.sum([batch[column] for column in COUNT_COLUMNS], axis=0)
+    credible = batch['mostly_true_counts'] + batch['true_counts']
+    credibility_score = np.divide(
+        credible, total_statements, out=np.zeros(len(total_statements), dtype='float64'), where=total_statements > 0
     )
-    if row["total_statements"] > 0:
-        row['credibility_score'] = (row['mostly_true_counts'] + row['true_counts']) / row['total_statements']
-    else:
-        row['credibility_score'] = 0
-    return row
+    return {
+        'total_statements': total_statements,
+        'credibility_score': credibility_score,
+        'disinfo': np.isin(batch['label'], FAKE_LABELS).astype('int8'),
+    }
+
+
+def with_year(table):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    # Le date non valide finiscono nella partizione year=__HIVE_DEFAULT_PARTITION__
+    dates = pc.strptime(table['date'], format='%Y-%m-%d', unit='s', error_is_null=True)
+    return table.append_column('year', pc.year(dates).cast(pa.int16()))
 
-train = train.map(calculate_total_statements)
-validation = validation.map(calculate_total_statements)
-test = test.map(calculate_total_statements)
 
-train_df = pd.DataFrame(train)
-validation_df = pd.DataFrame(validation)
-test_df = pd.DataFrame(test)
+def build(output, csv_path=None, cache_dir=None, offline=False, num_proc=None, batch_size=10_000):
+    if offline:
+        # Usa solo i file già presenti nella cache locale di HuggingFace
+        os.environ['HF_DATASETS_OFFLINE'] = '1'
+        os.environ['HF_HUB_OFFLINE'] = '1'
 
-combined_df = pd.concat([train_df, validation_df, test_df], ignore_index=True)
+    import pyarrow.csv as csv
+    import pyarrow.dataset as ds
+    from datasets import concatenate_datasets, load_dataset
 
-combined_df.to_csv("liar_credibility_score.csv", index=False)
+    dataset = load_dataset('chengxuphd/liar2', cache_dir=cache_dir)
 
+    # Le tre split restano file Arrow mappati in memoria: la concatenazione non copia i dati
+    liar_dataset = concatenate_datasets([dataset['train'], dataset['validation'], dataset['test']])
+    liar_dataset = liar_dataset.with_format('numpy').map(
+        calculate_total_statements,
+        input_columns=INPUT_COLUMNS,
+        batched=True,
+        batch_size=batch_size,
+        num_proc=num_proc,
+        desc='credibility_score',
+    )
+
+    # Scrittura a blocchi: in memoria c'è un solo batch alla volta
+    table = liar_dataset.with_format('arrow')
+    first = with_year(table[:1])
+    batches = (
+        batch
+        for start in range(0, len(table), batch_size)
+        for batch in with_year(table[start:start + batch_size]).to_batches()
+    )
+
+    # Header senza virgolette, identico a quello scritto da pandas
+    csv_writer = csv.CSVWriter(
+        csv_path, first.select(CSV_COLUMNS).schema, write_options=csv.WriteOptions(quoting_header='none')
+    ) if csv_path else None
 
-#dataset['total_statements'] = liar_dataset[['true_counts', 'mostly_true_counts', 'half_true_counts', 'mostly_false_counts', 'false_counts', 'pants_on_fire_counts']].sum(axis=1)
+    def write_csv(batches):
+        for batch in batches:
+            if csv_writer is not None:
+                csv_writer.write_batch(batch.select(CSV_COLUMNS))
+            yield batch
 
-#liar_dataset['Credibility Score'] = liar_dataset.apply(lambda row: (row['mostly_true_counts'] + row['true_counts']) / row['total_statements'] if row['total_statements'] > 0 else 0, axis=1)
+    try:
+        ds.write_dataset(
+            write_csv(batches),
+            output,
+            schema=first.schema,
+            format='parquet',
+            partitioning=ds.partitioning(first.select(['year']).schema, flavor='hive'),
+            existing_data_behavior='delete_matching',
+        )
+    finally:
+        if csv_writer is not None:
+            csv_writer.close()
 
+    return len(table)
 
-# Remove unnecessary columns
 
-#liar_dataset = liar_dataset.drop('total_statements', axis=1)
+def main():
+    parser = argparse.ArgumentParser(description='Crea il dataset LIAR2 con credibility_score e disinfo')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='cartella Parquet partizionata per anno (default: data/liar_parquet)')
+    parser.add_argument('--csv', help='scrive anche un CSV (es. data/liar_dataset.csv per la dashboard)')
+    parser.add_argument('--cache-dir', help='cache locale dei dataset HuggingFace')
+    parser.add_argument('--offline', action='store_true', help='non scarica nulla, usa solo la cache locale')
+    parser.add_argument('--num-proc', type=int, help='processi per il calcolo delle colonne derivate')
+    parser.add_argument('--batch-size', type=int, default=10_000)
+    args = parser.parse_args()
+
+    n_rows = build(
+        args.output,
+        csv_path=args.csv,
+        cache_dir=args.cache_dir,
+        offline=args.offline,
+        num_proc=args.num_proc,
+        batch_size=args.batch_size,
+    )
+    print(f'{n_rows} righe scritte in {args.output}')
+
 
-#liar_dataset.head()
\ No newline at end of file
+if __name__ == '__main__':
+    main()
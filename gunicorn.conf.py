@@ -0,0 +1,12 @@
+import multiprocessing
+import os
+
+# Avvio in produzione: gunicorn -c gunicorn.conf.py wsgi:server
+bind = os.environ.get('DASHBOARD_BIND', '0.0.0.0:8050')
+workers = int(os.environ.get('DASHBOARD_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.environ.get('DASHBOARD_THREADS', 4))
+worker_class = 'gthread'
+timeout = int(os.environ.get('DASHBOARD_TIMEOUT', 60))
+
+# Dati caricati nel master prima del fork (vedi wsgi.py)
+preload_app = True
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboards.aggregates import DisinfoTable, RatioRanking
+from dashboards.data import DASHBOARD_COLUMNS, clean
+from dashboards.dataset import load_dataset
+
+
+@pytest.fixture(scope='module')
+def frame():
+    return clean(load_dataset(DASHBOARD_COLUMNS)).sample(3000, random_state=0)
+
+
+def expected_page(df, column, min_support, n, offset):
+    # Stesso ordine calcolato con pandas: proporzione decrescente, a parità alfabetico
+    groups = df.groupby(df[column].astype(str))['disinfo']
+    ratios = pd.DataFrame({'disinfo_ratio': groups.mean(), 'total': groups.size()})
+    ratios = ratios[ratios['total'] >= min_support].sort_index()
+    ratios = ratios.sort_values('disinfo_ratio', ascending=False, kind='stable')
+    return ratios.iloc[offset:offset + n]
+
+
+@pytest.mark.parametrize('column', ['speaker', 'subject', 'context'])
+def test_ratio_ranking_pages_match_pandas(frame, column):
+    ranking = RatioRanking(DisinfoTable(frame, column).counts)
+    for min_support in [0, 1, 2, 5, 20, 10_000]:
+        assert ranking.count(min_support) == len(expected_page(frame, column, min_support, len(frame), 0))
+        for n, offset in [(10, 0), (10, 10), (25, 5), (7, 1000), (1000, 0), (0, 0)]:
+            page = ranking.top(min_support, n, offset)
+            expected = expected_page(frame, column, min_support, n, offset)
+            assert list(page.index) == list(expected.index)
+            np.testing.assert_allclose(page['disinfo_ratio'], expected['disinfo_ratio'])
+            np.testing.assert_array_equal(page['total'], expected['total'])
+
+
+def test_ratio_ranking_pages_cover_every_category_once(frame):
+    ranking = RatioRanking(DisinfoTable(frame, 'speaker').counts)
+    pages = [ranking.top(3, 10, offset) for offset in range(0, ranking.count(3), 10)]
+    names = [name for page in pages for name in page.index]
+    assert len(names) == len(set(names)) == ranking.count(3)
+    assert list(pd.concat(pages).index) == list(ranking.top(3, ranking.count(3)).index)
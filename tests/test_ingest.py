@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboards.data import DASHBOARD_COLUMNS, clean, registry
+from dashboards.dataset import CSV_PATH, append_rows, dataset_version, load_dataset
+from dashboards.ingest import apply_appended, ingest
+from dashboards.registry import DataRegistry
+
+PATCHED = ['speaker_cube', 'speaker_counts', 'context_counts', 'subject_counts', 'daily_series']
+
+
+@pytest.fixture
+def source(tmp_path):
+    # Primo blocco del dataset come storico, le righe successive come batch da aggiungere
+    rows = pd.read_csv(CSV_PATH, nrows=3000)
+    csv_path, cache_path = str(tmp_path / 'liar.csv'), str(tmp_path / 'liar.arrow')
+    rows.iloc[:2500].to_csv(csv_path, index=False)
+    return csv_path, cache_path, rows.iloc[2500:]
+
+
+def live_registry(csv_path, cache_path, builds=None):
+    # Provider e patch della dashboard sul dataset del test; builds registra i calcoli completi
+    providers = dict(registry.providers)
+    providers['dataset'] = (lambda: clean(load_dataset(DASHBOARD_COLUMNS, csv_path, cache_path)), ())
+    if builds is not None:
+        for name in PATCHED:
+            func, requires = providers[name]
+            providers[name] = (lambda *args, func=func, name=name: builds.append(name) or func(*args), requires)
+    return DataRegistry(providers, registry.patches, version=lambda: dataset_version(csv_path, cache_path))
+
+
+def assert_same_aggregates(live, rebuilt):
+    for name in ['speaker_counts', 'context_counts', 'subject_counts']:
+        pd.testing.assert_frame_equal(live.get(name).counts.sort_index(), rebuilt.get(name).counts.sort_index())
+    cube, expected = live.get('speaker_cube'), rebuilt.get('speaker_cube')
+    pd.testing.assert_frame_equal(cube.by_speaker.sort_index(), expected.by_speaker.sort_index())
+    assert cube.speakers == expected.speakers
+    for year in expected.years:
+        pd.testing.assert_frame_equal(cube.year_top(year), expected.year_top(year))
+    series, expected = live.get('daily_series'), rebuilt.get('daily_series')
+    np.testing.assert_array_equal(series.dates, expected.dates)
+    np.testing.assert_array_equal(series.label_sum, expected.label_sum)
+    np.testing.assert_array_equal(series.n_statements, expected.n_statements)
+
+
+def test_appended_rows_patch_live_registry(source):
+    csv_path, cache_path, batch = source
+    builds = []
+    live = live_registry(csv_path, cache_path, builds)
+    live.warm(PATCHED)
+    before = live.get('speaker_counts').counts['total'].sum()
+
+    # Come un worker della dashboard: il batch viene scritto da un altro processo
+    append_rows(batch, csv_path, cache_path)
+    assert apply_appended(live, csv_path, cache_path)
+
+    assert live.version() == dataset_version(csv_path, cache_path)
+    assert live.get('speaker_counts').counts['total'].sum() == before + len(clean(batch))
+    # Nessun aggregato ricalcolato da zero: solo le patch
+    assert sorted(builds) == sorted(PATCHED)
+    assert_same_aggregates(live, live_registry(csv_path, cache_path))
+
+
+def test_apply_keeps_every_loaded_name(source):
+    csv_path, cache_path, batch = source
+    builds = []
+    live = live_registry(csv_path, cache_path, builds)
+    live.warm()
+    names = set(live.loaded())
+    builds.clear()
+
+    append_rows(batch, csv_path, cache_path)
+    assert apply_appended(live, csv_path, cache_path)
+
+    # Gli altri dati sono già ricalcolati nello snapshot pubblicato, le patch restano tali
+    assert set(live.loaded()) == names
+    assert builds == []
+    total = len(clean(load_dataset(DASHBOARD_COLUMNS, csv_path, cache_path)))
+    assert live.get('filter_options')['total'] == total
+    assert live.get('query_engine').count({})[0] == total
+
+
+def test_ingest_updates_registry_in_process(source):
+    csv_path, cache_path, batch = source
+    live = live_registry(csv_path, cache_path)
+    live.warm(PATCHED)
+    ingest(batch.iloc[:200], csv_path, cache_path, registry=live)
+    ingest(batch.iloc[200:], csv_path, cache_path, registry=live)
+    assert live.version() == dataset_version(csv_path, cache_path)
+    assert_same_aggregates(live, live_registry(csv_path, cache_path))
+
+
+def test_rewritten_dataset_needs_full_reload(source):
+    csv_path, cache_path, batch = source
+    live = live_registry(csv_path, cache_path)
+    live.warm(PATCHED)
+    # Un CSV ricostruito non prosegue la catena dei segmenti
+    pd.concat([pd.read_csv(csv_path).iloc[100:], batch]).to_csv(csv_path, index=False)
+    assert not apply_appended(live, csv_path, cache_path)
+    assert live.reload()
+    assert_same_aggregates(live, live_registry(csv_path, cache_path))
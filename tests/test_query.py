@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboards import query
+from dashboards.data import DASHBOARD_COLUMNS, clean
+from dashboards.dataset import load_dataset
+from dashboards.query import QueryEngine
+
+
+@pytest.fixture(scope='module')
+def frame():
+    # Campione del dataset, con qualche contesto mancante (righe senza valore nella dimensione)
+    df = clean(load_dataset(DASHBOARD_COLUMNS)).sample(3000, random_state=0).reset_index(drop=True)
+    df.loc[df.index[::97], 'context'] = np.nan
+    return df
+
+
+def mask(df, filters):
+    selected = pd.Series(True, index=df.index)
+    for dimension, values in filters.items():
+        column = df['date'].dt.year if dimension == 'year' else df[dimension]
+        selected &= column.isin(values)
+    return selected.to_numpy()
+
+
+def some_filters(df):
+    speakers = df['speaker'].value_counts().index[:3].tolist()
+    contexts = df['context'].value_counts().index[:5].tolist()
+    return [
+        {'speaker': speakers},
+        {'label': [0, 1, 2], 'year': [2010, 2011, 2020]},
+        {'context': contexts, 'label': [4, 5]},
+        {'speaker': speakers, 'subject': df['subject'].value_counts().index[:10].tolist(), 'year': list(range(2005, 2025))},
+        {'speaker': ['nessuno-speaker'], 'label': [0]},
+    ]
+
+
+def test_rows_and_counts_match_pandas(frame):
+    engine = QueryEngine(frame)
+    assert engine.select({}) is None
+    assert engine.count({}) == (len(frame), int((frame['disinfo'] == 1).sum()))
+    for filters in some_filters(frame):
+        selected = mask(frame, filters)
+        np.testing.assert_array_equal(engine.rows(filters), np.flatnonzero(selected))
+        assert engine.count(filters) == (int(selected.sum()), int((frame['disinfo'].to_numpy()[selected] == 1).sum()))
+
+
+@pytest.mark.parametrize('dimension', ['speaker', 'context', 'year', 'label'])
+def test_group_matches_pandas(frame, dimension):
+    engine = QueryEngine(frame)
+    for filters in [{}] + some_filters(frame)[:4]:
+        rows = frame[mask(frame, filters)]
+        key = rows['date'].dt.year if dimension == 'year' else rows[dimension]
+        expected = rows.groupby(key.astype(engine.values[dimension].dtype), observed=True).agg(
+            total=('disinfo', 'size'), disinformation=('disinfo', 'sum'), credibility_score=('credibility_score', 'mean'),
+        )
+        counts = engine.group(dimension, filters, credibility=True)
+        assert list(counts.index) == list(expected.index)
+        np.testing.assert_array_equal(counts['total'], expected['total'])
+        np.testing.assert_array_equal(counts['disinformation'], expected['disinformation'])
+        np.testing.assert_allclose(counts['credibility_score'], expected['credibility_score'], rtol=1e-6)
+        # Senza credibility year e label usano le bitmap per valore invece del bincount
+        pd.testing.assert_frame_equal(engine.group(dimension, filters), counts.drop(columns='credibility_score'))
+
+
+def test_bitmap_cache_respects_byte_cap(frame, monkeypatch):
+    engine = QueryEngine(frame)
+    # Spazio per tre bitmap di valore
+    monkeypatch.setattr(query, 'BITMAP_CACHE_BYTES', 3 * engine.n_words * 8)
+    speakers = frame['speaker'].value_counts().index[:5].tolist()
+    for speaker in speakers:
+        assert engine.count({'speaker': [speaker]})[0] == int((frame['speaker'] == speaker).sum())
+    assert engine._cache_bytes <= query.BITMAP_CACHE_BYTES
+    cached = [engine.values['speaker'][code] for _, code in engine._cache]
+    assert cached == speakers[-3:]
+    # Un valore uscito dalla cache viene ricostruito con lo stesso risultato
+    np.testing.assert_array_equal(engine.rows({'speaker': speakers[:1]}), np.flatnonzero(mask(frame, {'speaker': speakers[:1]})))
+    assert [engine.values['speaker'][code] for _, code in engine._cache] == speakers[-2:] + speakers[:1]
@@ -0,0 +1,42 @@
+import time
+
+from dashboards.registry import DataRegistry
+from dashboards.reload import Reloader
+
+
+def versioned_registry(state):
+    registry = DataRegistry(version=lambda: state['version'])
+    registry.provider('value')(lambda: state['version'])
+    registry.warm()
+    return registry
+
+
+def test_broadcast_reaches_other_processes(tmp_path):
+    # Due Reloader sullo stesso file si comportano come due worker gunicorn
+    stamp_path = str(tmp_path / 'liar.reload')
+    state = {'version': 'a'}
+    first, second = Reloader(versioned_registry(state), 0, stamp_path, 0.01), Reloader(versioned_registry(state), 0, stamp_path, 0.01)
+    second.start()
+
+    state['version'] = 'b'
+    first.broadcast()
+    deadline = time.monotonic() + 5
+    while second.registry.get('value') != 'b' and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert second.registry.get('value') == 'b'
+    assert second.reloads == 1
+    # Chi scrive il file non lo rilegge come una nuova richiesta
+    assert not first._stamped()
+
+
+def test_broadcast_before_start_is_applied(tmp_path):
+    stamp_path = str(tmp_path / 'liar.reload')
+    state = {'version': 'a'}
+    worker = Reloader(versioned_registry(state), 0, stamp_path, 60)
+    state['version'] = 'b'
+    Reloader(versioned_registry(state), 0, stamp_path, 60).broadcast()
+    worker.start()
+    deadline = time.monotonic() + 5
+    while worker.registry.get('value') != 'b' and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert worker.registry.get('value') == 'b'
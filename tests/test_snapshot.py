@@ -0,0 +1,36 @@
+import json
+import struct
+
+from dashboards import snapshot
+from dashboards.data import registry
+from dashboards.tabs.filters import update_summary
+
+
+def test_snapshot_round_trip_keeps_filters_working(tmp_path):
+    path = str(tmp_path / 'liar.snapshot')
+    snapshot.save(path)
+    engine = registry.get('query_engine')
+    names = set(registry.loaded())
+    speaker = registry.get('filter_options')['speaker'][0]
+    # Bitmap del valore già in cache prima del salvataggio
+    expected = engine.count({'speaker': [speaker], 'label': [0, 1, 2]})
+
+    assert snapshot.load(path)
+    restored = registry.get('query_engine')
+    assert restored is not engine
+    assert set(registry.loaded()) == names - set(snapshot.SKIP)
+    assert restored.count({'speaker': [speaker], 'label': [0, 1, 2]}) == expected
+    assert update_summary({'speaker': [speaker]}).startswith(f'{restored.count({"speaker": [speaker]})[0]} statement')
+
+
+def test_snapshot_of_older_format_is_rejected(tmp_path):
+    path = str(tmp_path / 'liar.snapshot')
+    snapshot.save(path)
+    with open(path, 'rb') as f:
+        header = snapshot.read_header(f)
+        payload = f.read()
+    header['format'] = snapshot.SNAPSHOT_FORMAT - 1
+    data = json.dumps(header).encode()
+    with open(path, 'wb') as f:
+        f.write(snapshot.MAGIC + struct.pack('<I', len(data)) + data + payload)
+    assert not snapshot.load(path)
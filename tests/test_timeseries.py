@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboards.aggregates import CREDIBLE_LABELS, LABELS
+from dashboards.data import DASHBOARD_COLUMNS, clean
+from dashboards.dataset import load_dataset
+from dashboards.timeseries import SpeakerTimeline
+
+
+@pytest.fixture(scope='module')
+def frame():
+    return clean(load_dataset(DASHBOARD_COLUMNS)).sample(3000, random_state=0)
+
+
+def expected_counts(df, speakers, start=None, end=None):
+    # Conteggi per label con pandas: una riga per speaker, date in [start, end]
+    rows = df
+    if start is not None:
+        rows = rows[rows['date'] >= pd.Timestamp(start)]
+    if end is not None:
+        rows = rows[rows['date'] < pd.Timestamp(end) + pd.Timedelta(days=1)]
+    counts = pd.crosstab(rows['speaker'].astype(str), rows['label']).reindex(index=speakers, columns=LABELS, fill_value=0)
+    return counts.to_numpy(dtype='int64')
+
+
+def test_counts_match_pandas(frame):
+    timeline = SpeakerTimeline(frame)
+    speakers = frame['speaker'].astype(str).value_counts().index[:20].tolist() + ['nessuno-speaker']
+    for start, end in [(None, None), (None, '2012-12-31'), ('2010-01-01', '2015-06-30'), ('2016-03-01', '2016-03-01'), ('2030-01-01', None)]:
+        np.testing.assert_array_equal(timeline.counts(speakers, start, end), expected_counts(frame, speakers, start, end))
+
+
+def test_counts_with_an_interval_per_speaker(frame):
+    timeline = SpeakerTimeline(frame)
+    speakers = frame['speaker'].astype(str).value_counts().index[:10].tolist()
+    ends = np.array([f'{year}-12-31' for year in range(2010, 2020)], dtype='datetime64[D]')
+    expected = np.vstack([expected_counts(frame, [speaker], None, end) for speaker, end in zip(speakers, ends)])
+    np.testing.assert_array_equal(timeline.counts(speakers, None, ends), expected)
+
+
+@pytest.mark.parametrize('mode', ['cumulative', 'year'])
+def test_year_credibility_matches_pandas(frame, mode):
+    timeline = SpeakerTimeline(frame)
+    speakers = frame['speaker'].astype(str).value_counts().index[:20].tolist()
+    for year in [2008, 2015, 2024]:
+        counts = expected_counts(frame, speakers, f'{year}-01-01' if mode == 'year' else None, f'{year}-12-31')
+        total = counts.sum(axis=1)
+        expected = np.where(total > 0, counts[:, CREDIBLE_LABELS].sum(axis=1) / np.maximum(total, 1), np.nan)
+        np.testing.assert_allclose(timeline.year_credibility(speakers, year, mode), expected)
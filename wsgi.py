@@ -0,0 +1,18 @@
+import gc
+
+from dashboard import app
+from dashboards.tabs import TABS, render_tab_content, warm
+
+# Con gunicorn --preload questo modulo viene importato una sola volta nel master:
+# dataset, aggregati e layout dei tab vengono calcolati prima del fork e i worker
+# condividono le stesse pagine di memoria in copy-on-write
+warm(TABS)
+for tab_id in TABS:
+    render_tab_content(tab_id)
+
+# Sposta gli oggetti già creati fuori dalla generazione del GC, così le raccolte
+# nei worker non toccano (e non copiano) le pagine condivise
+gc.collect()
+gc.freeze()
+
+server = app.server